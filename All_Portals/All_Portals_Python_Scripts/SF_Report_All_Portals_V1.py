@@ -0,0 +1,101 @@
+import argparse
+import time
+import sys
+import os
+import pandas as pd
+from openpyxl import load_workbook
+
+# Shared helpers live in Common/Common_Python_Scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Common", "Common_Python_Scripts"))
+from SF_Sidecar import write_sidecar
+from SF_Report_Scan import ReportScan
+from SF_Report_Counts import PORTAL_REPORTS, portal_report_counts
+from SF_Report_Sheet import write_report_sheet
+
+REPORT_SHEET = 'All_Portals_Report'
+
+# === File wait utility ===
+def wait_for_file(filepath, timeout=20):
+    print(f"Waiting for file: {filepath}")
+    if os.path.basename(filepath).startswith('~$'):
+        print(f"Error: The file {filepath} looks like a temporary Excel lock file (starts with '~$').")
+        sys.exit(1)
+
+    start_time = time.time()
+    while True:
+        try:
+            if os.path.exists(filepath):
+                with open(filepath, 'rb'):
+                    print(f"File ready: {filepath}")
+                    return
+        except Exception:
+            pass
+        if time.time() - start_time > timeout:
+            print(f"Timeout: File not accessible after {timeout} seconds -> {filepath}")
+            sys.exit(1)
+        time.sleep(1)
+
+# === Get command line args ===
+# One read of every market sheet for all three portal reports: each sheet is scanned once for the
+# UHC, CIGNA and Availity columns, and the workbook is saved once with the All_Portals_Report sheet
+# (and, with --per-portal, UHC_Report / Cigna_Report / Availity_Report as the portal scripts make
+# them). Portals whose column is on no market sheet are left out.
+arg_parser = argparse.ArgumentParser(description="Write one summary of every portal's results to the SF workbook.")
+arg_parser.add_argument("sf_path", help="Salesforce UserAccountDeactivationReport workbook")
+arg_parser.add_argument("--per-portal", action="store_true",
+                        help="also write the UHC_Report, Cigna_Report and Availity_Report sheets")
+
+# === Startup ===
+print("Starting SF_Report_All_Portals summary script...\n")
+
+args = arg_parser.parse_args()
+sf_path = args.sf_path
+wait_for_file(sf_path)
+
+try:
+    # Scan the sheets read-only; the workbook is loaded for editing only to insert the reports
+    scan = ReportScan(sf_path)
+    portal_columns = [report.column for report in PORTAL_REPORTS]
+    market_rows = []  # (market, SF_COUNT, counts per portal report)
+    present = set()
+
+    for sheet_name in scan.sheetnames:
+        if "Report" in sheet_name:  # Skip any sheet with 'Report' in its name
+            continue
+
+        print(f"Processing sheet: {sheet_name}")
+        total, values = scan.columns(sheet_name, portal_columns)
+        present.update(values)
+        market_rows.append((sheet_name, total, [
+            portal_report_counts(report, sheet_name, values.get(report.column)) for report in PORTAL_REPORTS
+        ]))
+
+    scan.close()
+    reports = [(i, report) for i, report in enumerate(PORTAL_REPORTS) if report.column in present]
+    if not reports:
+        print("No UHC, CIGNA or Availity column found on any market sheet; writing SF counts only.")
+
+    wb = load_workbook(sf_path)
+
+    headers = ['Market', 'SF_COUNT'] + [header for _, report in reports for header, _ in report.outcomes]
+    summary_data = [
+        [sheet_name, total] + [count for i, _ in reports for count in counts[i]]
+        for sheet_name, total, counts in market_rows
+    ]
+    rows = write_report_sheet(wb, REPORT_SHEET, 0, headers, summary_data)
+    scan.frames[REPORT_SHEET] = pd.DataFrame(rows, columns=headers)
+
+    if args.per_portal:
+        for position, (i, report) in enumerate(reports, start=1):
+            headers = ['Market', 'SF_COUNT'] + [header for header, _ in report.outcomes]
+            summary_data = [[sheet_name, total] + counts[i] for sheet_name, total, counts in market_rows]
+            rows = write_report_sheet(wb, report.sheet_name, position, headers, summary_data)
+            scan.frames[report.sheet_name] = pd.DataFrame(rows, columns=headers)
+
+    wb.save(sf_path)
+    write_sidecar(sf_path, scan.frames, wb.sheetnames)
+    print("Combined summary sheet created successfully as the first sheet.")
+
+except Exception as e:
+    print("An error occurred:", str(e))
+    sys.exit(1)
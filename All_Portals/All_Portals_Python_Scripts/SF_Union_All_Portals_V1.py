@@ -0,0 +1,59 @@
+import argparse
+import time
+import sys
+import os
+
+# Shared helpers live in Common/Common_Python_Scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Common", "Common_Python_Scripts"))
+from Portal_Adapters import PORTAL_ADAPTERS
+from Portal_Engine import reconcile_portals
+
+# === File wait utility ===
+def wait_for_file(filepath, timeout=20):
+    print(f"Waiting for file: {filepath}")
+    if os.path.basename(filepath).startswith('~$'):
+        print(f"Error: The file {filepath} looks like a temporary Excel lock file (starts with '~$').")
+        print("Please use the actual file, not the temp one.")
+        sys.exit(1)
+
+    start_time = time.time()
+    while True:
+        try:
+            if os.path.exists(filepath):
+                with open(filepath, 'rb'):
+                    print(f"File ready: {filepath}")
+                    return
+        except Exception:
+            pass
+        if time.time() - start_time > timeout:
+            print(f"Timeout: File not accessible after {timeout} seconds -> {filepath}")
+            sys.exit(1)
+        time.sleep(1)
+
+# === Get command line args ===
+# Same result as running SF_Union_Portals_V7, SF_Union_Cigna_V1 and SF_Union_Portal_Availity_V7 one
+# after the other, but the SF workbook is loaded and saved only once. Every portal registered in
+# Portal_Adapters gets a --<name> option.
+arg_parser = argparse.ArgumentParser(description="Add the portal columns to the SF workbook in one pass.")
+arg_parser.add_argument("sf_path", help="Salesforce UserAccountDeactivationReport workbook")
+for adapter in PORTAL_ADAPTERS.values():
+    arg_parser.add_argument(f"--{adapter.name}", metavar="EXPORT", help=f"{adapter.label} portal export")
+
+# === Startup ===
+print("Starting SF_Union_All_Portals processing script...\n")
+
+args = arg_parser.parse_args()
+portal_paths = {name: getattr(args, name) for name in PORTAL_ADAPTERS if getattr(args, name)}
+if not portal_paths:
+    print(f"Error: Give at least one portal export ({', '.join('--' + name for name in PORTAL_ADAPTERS)}).")
+    sys.exit(1)
+
+wait_for_file(args.sf_path)
+for portal_path in portal_paths.values():
+    wait_for_file(portal_path)
+
+try:
+    reconcile_portals(args.sf_path, portal_paths)
+except Exception as e:
+    print("An error occurred:", str(e))
+    sys.exit(1)
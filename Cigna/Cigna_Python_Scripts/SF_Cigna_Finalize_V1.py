@@ -0,0 +1,90 @@
+import sys
+import os
+import time
+import pandas as pd
+from openpyxl import load_workbook
+
+# Shared helpers live in Common/Common_Python_Scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Common", "Common_Python_Scripts"))
+from SF_Sidecar import load_sidecar, write_sidecar
+from SF_Failures import mark_failures
+from SF_Report_Counts import PORTAL_REPORTS, portal_report_counts
+from SF_Report_Sheet import write_report_sheet
+
+# Markets to skip from the failure pass
+skip_markets = ["UL", "UM", "NE", "UG", "CW", "Other"]
+CIGNA_REPORT = next(report for report in PORTAL_REPORTS if report.sheet_name == 'Cigna_Report')
+
+# === File wait utility ===
+def wait_for_file(filepath, timeout=20):
+    """Wait until file is accessible and not a temporary Excel lock file."""
+    print(f"Waiting for file: {filepath}")
+    if os.path.basename(filepath).startswith("~$"):
+        print(f"Error: {filepath} is a temporary Excel lock file. Provide actual file.")
+        sys.exit(1)
+
+    start_time = time.time()
+    while True:
+        try:
+            if os.path.exists(filepath):
+                with open(filepath, "rb"):
+                    print(f"File ready: {filepath}")
+                    return
+        except Exception:
+            pass
+        if time.time() - start_time > timeout:
+            print(f"Timeout: File not accessible after {timeout} seconds -> {filepath}")
+            sys.exit(1)
+        time.sleep(1)
+
+# === Startup ===
+# Run once the bot has posted its deactivation results. Does what SF_Report_Failure_V1 followed by
+# CignaSF_Report_V1 do, with one load and one save of the workbook: leftover emails in the portal
+# columns become failures, and Cigna_Report is built from the sheets as they are in memory.
+print("Starting SF_Cigna_Finalize script...\n")
+
+# === Get args ===
+if len(sys.argv) != 2:
+    print("Usage: python SF_Cigna_Finalize_V1.py <salesforce_report_path>")
+    sys.exit(1)
+
+sf_path = sys.argv[1]
+wait_for_file(sf_path)
+
+try:
+    # === Load workbook ===
+    sidecar = load_sidecar(sf_path)  # before the save changes the workbook stamp
+    work_book = load_workbook(sf_path)
+
+    # === Mark unresolved emails as failures ===
+    changed_sheets = mark_failures(work_book, [s for s in work_book.sheetnames if s not in skip_markets])
+
+    # === Build Cigna_Report from the in-memory sheets ===
+    # Unchanged sheets come from the sidecar when it is current; the rest are parsed from memory
+    frames = {
+        name: df for name, df in (sidecar.frames.items() if sidecar is not None else ())
+        if name not in changed_sheets
+    }
+    excel_file = pd.ExcelFile(work_book, engine="openpyxl")
+    summary_data = []
+    for sheet_name in work_book.sheetnames:
+        if "Report" in sheet_name:  # Skip any sheet with 'Report' in its name
+            continue
+        if sheet_name not in frames:
+            frames[sheet_name] = excel_file.parse(sheet_name)
+        df = frames[sheet_name]
+        cigna_values = df[CIGNA_REPORT.column] if CIGNA_REPORT.column in df.columns else None
+        summary_data.append([sheet_name, len(df)] + portal_report_counts(CIGNA_REPORT, sheet_name, cigna_values))
+
+    headers = ['Market', 'SF_COUNT'] + [header for header, _ in CIGNA_REPORT.outcomes]
+    rows = write_report_sheet(work_book, CIGNA_REPORT.sheet_name, 0, headers, summary_data)
+    frames[CIGNA_REPORT.sheet_name] = pd.DataFrame(rows, columns=headers)
+
+    # Save updated workbook
+    work_book.save(sf_path)
+    write_sidecar(sf_path, frames, work_book.sheetnames)
+    print(f"\nReport updated successfully -> {sf_path}")
+
+except Exception as e:
+    print("An error occurred:", str(e))
+    sys.exit(1)
@@ -1,11 +1,15 @@
 import sys
 import os
 import time
-import re
+import pandas as pd
 from openpyxl import load_workbook
 
+# Shared helpers live in Common/Common_Python_Scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Common", "Common_Python_Scripts"))
+from SF_Sidecar import load_sidecar, write_sidecar
+from SF_Failures import mark_failures
+
 skip_markets = ["UL", "UM", "NE", "UG", "CW", "Other"]
-EMAIL_REGEX = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
 
 # === File wait utility ===
 def wait_for_file(filepath, timeout=20):
@@ -43,6 +47,7 @@ wait_for_file(sf_report_path)
 
 try:
     # === Load workbook ===
+    sidecar = load_sidecar(sf_report_path)  # before the save changes the workbook stamp
     work_book = load_workbook(sf_report_path)
     all_sheets = work_book.sheetnames
     sheets_to_process = [s for s in all_sheets if s not in skip_markets]
@@ -51,42 +56,15 @@ try:
         print("No valid sheets found to process. Exiting.")
         sys.exit(0)
 
-    for sheet_name in sheets_to_process:
-        print(f"Processing sheet: {sheet_name}")
-        try:
-            ws = work_book[sheet_name]
-
-            # Skip if sheet empty
-            if ws.max_row < 2 or ws.max_column < 1:
-                print(f"Sheet {sheet_name} is empty. Skipping.")
-                continue
-
-            # Extract headers from first row
-            headers = [str(cell.value).strip() if cell.value else "" for cell in ws[1]]
-            headers_upper = [h.upper().replace(" ", "_") for h in headers] 
-
-            if "EMAIL" not in headers_upper:
-                print(f"No 'EMAIL' column in {sheet_name}. Skipping.")
-                continue
-
-            email_col_idx = headers_upper.index("EMAIL") + 1  # 1-based index
-
-            # Iterate rows (skip header row)
-            for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
-                for col_idx, cell in enumerate(row, start=1):
-                    if col_idx == email_col_idx:
-                        continue  # skip EMAIL column
-
-                    val = str(cell.value).strip() if cell.value else ""
-                    if EMAIL_REGEX.match(val):
-                        cell.value = "Failure - Action required"
-
-        except Exception as sheet_err:
-            print(f"Error processing sheet {sheet_name}: {sheet_err}")
-            continue
+    changed_sheets = mark_failures(work_book, sheets_to_process)
 
     # Save updated workbook
     work_book.save(sf_report_path)
+    # Unchanged sheets keep their sidecar frames; only the changed ones are parsed again, from memory
+    frames = dict(sidecar.frames) if sidecar is not None else {}
+    if changed_sheets:
+        frames.update(pd.read_excel(work_book, sheet_name=changed_sheets, engine="openpyxl"))
+    write_sidecar(sf_report_path, frames, work_book.sheetnames)
     print(f"\nReport updated successfully -> {sf_report_path}")
 
 except Exception as e:
@@ -0,0 +1,342 @@
+import io
+import os
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from Roster_Cache import load_cached_roster, roster_cache_key, store_cached_roster
+
+from Portal_Status import build_status_lookup, uhc_status, cigna_status, availity_status
+
+# === Portal adapters ===
+# Everything that differs between payer portals lives in one PortalAdapter subclass: the roster
+# export's columns, how an email maps to the portal column, which market sheets are skipped and the
+# active-email CSV. Portal_Engine runs registered adapters over the SF workbook, so onboarding a new
+# portal means writing an adapter and decorating it with @register_portal.
+
+EMAIL_PATTERN = r"[^@]+@[^@]+\.[^@]+"
+
+PORTAL_ADAPTERS = {}
+
+def register_portal(adapter_class):
+    """Class decorator adding an adapter to PORTAL_ADAPTERS; portals run in registration order."""
+    PORTAL_ADAPTERS[adapter_class.name] = adapter_class()
+    return adapter_class
+
+def get_portal(name):
+    try:
+        return PORTAL_ADAPTERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown portal '{name}'. Known portals: {', '.join(PORTAL_ADAPTERS)}")
+
+def read_roster_csv(path, columns=None, category_columns=()):
+    """Read a roster export CSV, keeping only `columns` and storing category_columns as categoricals.
+
+    The file is read from disk once: when it is not valid UTF-8 the same bytes are parsed as latin1.
+    """
+    with open(path, 'rb') as f:
+        data = io.BytesIO(f.read())
+    read_options = dict(
+        usecols=None if columns is None else (lambda col: col in columns),
+        dtype={col: 'category' for col in category_columns},
+    )
+    try:
+        return pd.read_csv(data, encoding='utf-8', **read_options)
+    except UnicodeDecodeError:
+        data.seek(0)
+        return pd.read_csv(data, encoding='latin1', **read_options)  # fallback
+
+def normalize_category(series, normalize):
+    """Apply a .str normalization to a categorical column once per distinct value, keeping it
+    categorical (values that normalize alike share a category)."""
+    categories = pd.Series(series.cat.categories, dtype=object)
+    if categories.empty:
+        return series
+    category_codes, uniques = pd.factorize(normalize(categories))
+    codes = series.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, category_codes[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories=uniques), index=series.index, name=series.name)
+
+def write_csv_atomic(df, output_path):
+    # Write next to the target and rename over it, so the bot never picks up a half-written CSV
+    temp_path = output_path + ".tmp"
+    try:
+        df.to_csv(temp_path, index=False)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+class PortalAdapter:
+    """One payer portal. Subclasses set the attributes below and implement build_roster(),
+    status() and active_rows()."""
+    name = None                 # registry key, also the --<name> option of SF_Union_All_Portals
+    label = None                # portal name in messages
+    column = None               # SF sheet column the result goes to
+    move_column_last = False    # move an existing result column to the end of the sheet
+    roster_columns = []         # columns the roster export must have; no others are loaded
+    category_columns = []       # low-cardinality roster columns (status, market, org) kept categorical
+    skip_markets = []           # market sheets the portal does not touch
+    csv_name = None             # active-email CSV is <ddmmyyyy>_<csv_name>.csv
+    csv_columns = []
+
+    def read_roster(self, path):
+        return read_roster_csv(path, self.roster_columns, self.category_columns)
+
+    def roster_build_inputs(self):
+        """Settings build_roster() depends on besides the export; they are part of the roster cache key."""
+        return [self.roster_columns, self.category_columns]
+
+    def load_roster(self, path):
+        """The built roster for the export at path, from the roster cache when the file is unchanged."""
+        cache_key = roster_cache_key(self.name, path, self.roster_build_inputs())
+        roster = load_cached_roster(cache_key)
+        if roster is not None:
+            print(f"Using cached {self.label} roster index.")
+            return roster
+        roster_df = self.read_roster(path)
+        for col in self.roster_columns:
+            if col not in roster_df.columns:
+                raise ValueError(f"Column '{col}' not found in {self.label} export.")
+        roster = self.build_roster(roster_df)
+        store_cached_roster(cache_key, roster)
+        return roster
+
+    def build_roster(self, roster_df):
+        """Turn the roster export into whatever status() and active_rows() look things up in."""
+        raise NotImplementedError
+
+    def sheet_jobs(self, sheetnames):
+        """(sheet name, job) pairs to process; job is handed to status()."""
+        return [(sheet_name, None) for sheet_name in sheetnames if sheet_name not in self.skip_markets]
+
+    def status(self, emails, roster, job):
+        """Portal column for a sheet's normalized EMAIL column."""
+        raise NotImplementedError
+
+    def active_mask(self, values):
+        """Rows whose portal value is still an active email, i.e. left for the bot."""
+        return values.astype(object).str.match(EMAIL_PATTERN, na=False)
+
+    def active_rows(self, sf_df, sheet_name, roster):
+        """CSV rows for the sheet's still-active emails, from one mask over the portal column."""
+        active = self.active_mask(sf_df[self.column]).to_numpy(dtype=bool)
+        rows = pd.DataFrame({
+            'Email': sf_df['EMAIL'][active],
+            'Row': sf_df.index[active] + 2,  # +2 for header
+            'Column': sf_df.columns.get_loc(self.column) + 1,
+            'Sheet': sheet_name,
+        }, columns=['Email', 'Row', 'Column', 'Sheet'])
+        return self.row_details(rows, sf_df[active], roster)
+
+    def row_details(self, rows, active_df, roster):
+        """Add per-row CSV columns taken from the sheet (active_df holds the same rows)."""
+        return rows
+
+    def csv_path(self, sf_path):
+        timestamp = datetime.now().strftime("%d%m%Y")
+        return os.path.join(os.path.dirname(sf_path), f"{timestamp}_{self.csv_name}.csv")
+
+    def build_csv(self, row_frames, roster):
+        """The CSV from every job's active_rows(), in job order; roster lookups and dedup go here."""
+        row_frames = [f for f in row_frames if not f.empty]
+        return pd.concat(row_frames, ignore_index=True) if row_frames else pd.DataFrame(columns=self.csv_columns)
+
+    def write_csv(self, sf_path, csv_df):
+        if csv_df.empty:
+            print(f"No active {self.label} emails found; no CSV created.")
+            return
+        output_path = self.csv_path(sf_path)
+        write_csv_atomic(csv_df, output_path)
+        print(f"CSV saved: {output_path}")
+
+# === UHC ===
+
+UHCRoster = namedtuple("UHCRoster", ["lookup", "email_index"])
+
+@register_portal
+class UHCPortal(PortalAdapter):
+    name = "uhc"
+    label = "UHC"
+    column = "UHC"
+    roster_columns = ['Email Address', 'Status', 'Market']
+    category_columns = ['Status', 'Market']
+    skip_markets = ["UL", "UM", "NE", "UG", "CW", "AG", "OV", "Other"]
+    csv_name = "UHCActive"
+    csv_columns = ['Email', 'Row', 'Column', 'Sheet', 'M_UHC', 'User Active Markets']
+
+    def build_roster(self, uhc_df):
+        uhc_df['Email Address'] = uhc_df['Email Address'].str.lower().str.strip()
+        uhc_df['Market'] = normalize_category(uhc_df['Market'], lambda s: s.str.strip())
+
+        # Create a mapping of active markets for each email
+        active_markets_map = (
+            uhc_df[uhc_df['Status'].str.lower() != 'inactive']
+            .groupby('Email Address')['Market']
+            .apply(lambda x: ','.join(sorted(set(x))))
+            .to_dict()
+        )
+
+        # Email -> first roster market (M_UHC) and active markets, built once for the CSV join
+        email_index = (
+            uhc_df.drop_duplicates('Email Address', keep='first')
+            .set_index('Email Address')[['Market']]
+            .rename(columns={'Market': 'M_UHC'})
+            .astype(object)
+        )
+        email_index['User Active Markets'] = email_index.index.map(active_markets_map)
+        return UHCRoster(build_status_lookup(uhc_df['Email Address'], uhc_df['Status']), email_index)
+
+    def status(self, emails, roster, job):
+        return uhc_status(emails, roster.lookup)
+
+    def build_csv(self, row_frames, roster):
+        csv_df = super().build_csv(row_frames, roster)
+        if csv_df.empty:
+            return csv_df
+        csv_df = csv_df.join(roster.email_index, on='Email')  # still keep M_UHC in CSV
+        csv_df[['M_UHC', 'User Active Markets']] = csv_df[['M_UHC', 'User Active Markets']].fillna('')
+        return csv_df
+
+# === Cigna ===
+
+@register_portal
+class CignaPortal(PortalAdapter):
+    name = "cigna"
+    label = "Cigna"
+    column = "CIGNA"
+    roster_columns = ['EMAIL', 'STATUS']
+    category_columns = ['STATUS']
+    skip_markets = ["UL", "UM", "NE", "UG", "CW", "Other"]
+    csv_name = "CignaActive"
+    csv_columns = ['Email', 'Row', 'Column', 'Sheet', 'First Name', 'Last Name']
+
+    def build_roster(self, cigna_df):
+        cigna_df['EMAIL'] = cigna_df['EMAIL'].str.lower().str.strip()
+        return build_status_lookup(cigna_df['EMAIL'], cigna_df['STATUS'])
+
+    def status(self, emails, roster, job):
+        return cigna_status(emails, roster)
+
+    def active_mask(self, values):
+        # Cigna's rule: any value still ending in .com
+        return values.astype(object).str.endswith('.com', na=False)
+
+    def row_details(self, rows, active_df, roster):
+        # Normalize columns for lookup
+        active_df = active_df.set_axis([col.strip().upper().replace(" ", "_") for col in active_df.columns], axis=1)
+        rows['First Name'] = active_df['FN'] if 'FN' in active_df.columns else ''
+        rows['Last Name'] = active_df['LN'] if 'LN' in active_df.columns else ''
+        return rows
+
+    def build_csv(self, row_frames, roster):
+        # Remove duplicate rows based on Email, Row and Column
+        return super().build_csv(row_frames, roster).drop_duplicates(subset=['Email', 'Row', 'Column'])
+
+# === Availity ===
+
+AvailityRoster = namedtuple("AvailityRoster", ["global_lookup", "org_lookups", "email_to_active_orgs"])
+
+@register_portal
+class AvailityPortal(PortalAdapter):
+    name = "availity"
+    label = "Availity"
+    column = "Availity"
+    move_column_last = True
+    roster_columns = ['Email Address', 'Organization (Customer ID)', 'Status']
+    category_columns = ['Organization (Customer ID)', 'Status']
+    csv_name = "AvailityActiveEmails"
+    csv_columns = ['Email', 'Row', 'Column', 'Sheet', 'User Active Markets']
+
+    # === Mapping Org to Sheet ===
+    # Sheets come from this mapping (plus MSO, checked against every org) rather than a skip list
+    org_to_sheet = {
+        "FLORIDA WOMAN CARE, LLC(70064)": "FL",
+        "GENESIS OB/GYN(355998)": "AZ",
+        "MID-ATLANTICWOMENSCARE, PLC(528579)": "MW",
+        "MIDWEST CENTER FOR WOMEN'S HEALTHCARE(63366)": "IL",
+        "MIDWEST CENTER FOR WOMEN'S HEALTHCARE(63366)": "IM",
+        "NEW JERSEY PERINATAL ASSOCS(517429)": "NP",
+        "PREMIER OBGYN OF MN(319136)": "MN",
+        "UWH OF MICHIGAN, PLC(780558)": "MG",
+        "OB/GYN Associates of Erie, PC(592003)" : "PE",
+        "OB-GYN Associates of Erie Laboratory LLC(994204)" : "PE",
+        "FWC REI LLC(411722)" : "FL",
+        "FWC GYN ONCOLOGY LLC(411723)" : "FL",
+        "FWC UROGYNECOLOGY LLC(411822)":"FL",
+        "FWC PERINATAL LLC(411726)":"FL",
+        "Square Care Medical Group, LLP(423268)": "NY",
+        "UNIFIED WOMENS HEALTHCARE OF TEXAS(571405)": "TX",
+        "UWH of North Carolina,LLP(463617)": ["NC","SC"]
+    }
+    all_orgs_job = "MSO_ALL_ORGS"
+
+    def read_roster(self, path):
+        try:
+            return pd.read_excel(
+                path, engine='openpyxl',
+                usecols=lambda col: col in self.roster_columns,
+                dtype={col: 'category' for col in self.category_columns},
+            )
+        except Exception as e:
+            raise ValueError(f"Error reading Availity Excel: {str(e)}")
+
+    def roster_build_inputs(self):
+        # email_to_active_orgs is joined against org_to_sheet
+        return super().roster_build_inputs() + [self.org_to_sheet]
+
+    def build_roster(self, availity_df):
+        # Normalize
+        availity_df['Email Address'] = availity_df['Email Address'].str.lower().str.strip()
+        availity_df['Organization (Customer ID)'] = normalize_category(
+            availity_df['Organization (Customer ID)'], lambda s: s.str.strip().str.upper())
+        availity_df['Status'] = normalize_category(availity_df['Status'], lambda s: s.str.strip().str.upper())
+
+        # Per-org status lookups, built in one groupby pass
+        org_lookups = {
+            org_upper: build_status_lookup(org_df['Email Address'], org_df['Status'])
+            for org_upper, org_df in availity_df.groupby('Organization (Customer ID)', sort=False, observed=True)
+        }
+
+        # Email-to-active-orgs map: sorted, comma-joined org_to_sheet names
+        org_names = pd.DataFrame(
+            [(org_name.strip().upper(), org_name) for org_name in self.org_to_sheet],
+            columns=['Organization (Customer ID)', 'Org Name']
+        )
+        email_to_active_orgs = (
+            availity_df[availity_df['Status'].isin(['ACTIVE', 'LOCKED'])]
+            [['Email Address', 'Organization (Customer ID)']]
+            .drop_duplicates()
+            .merge(org_names, on='Organization (Customer ID)')
+            .sort_values(['Email Address', 'Org Name'])
+            .groupby('Email Address')['Org Name']
+            .agg(','.join)
+            .to_dict()
+        )
+        global_lookup = build_status_lookup(availity_df['Email Address'], availity_df['Status'])
+        return AvailityRoster(global_lookup, org_lookups, email_to_active_orgs)
+
+    def sheet_jobs(self, sheetnames):
+        # One job per org; several orgs can share a sheet, and the last one's column is kept
+        sheet_jobs = []
+        for org_name, sheet_abbr in self.org_to_sheet.items():
+            for abbr in (sheet_abbr if isinstance(sheet_abbr, list) else [sheet_abbr]):
+                sheet_jobs.append((abbr, org_name))
+        if "MSO" in sheetnames:
+            sheet_jobs.append(("MSO", self.all_orgs_job))
+        return sheet_jobs
+
+    def status(self, emails, roster, job):
+        if job == self.all_orgs_job:
+            org_lookup = roster.global_lookup
+        else:
+            org_lookup = roster.org_lookups.get(job.strip().upper(), build_status_lookup([], []))
+        return availity_status(emails, org_lookup, roster.global_lookup)
+
+    def build_csv(self, row_frames, roster):
+        # Remove duplicate rows based on Email, Row, Column, and Sheet, once over all jobs
+        csv_df = super().build_csv(row_frames, roster).drop_duplicates(subset=['Email', 'Row', 'Column', 'Sheet'])
+        csv_df['User Active Markets'] = csv_df['Email'].map(roster.email_to_active_orgs).fillna('')
+        return csv_df
@@ -0,0 +1,88 @@
+from SF_Workbook import SFWorkbook
+from Portal_Adapters import PORTAL_ADAPTERS, get_portal
+
+# === Multi-portal reconciliation engine ===
+# Adds the columns of any set of portals (see Portal_Adapters) to the SF workbook in one load/save
+# cycle. Each portal runs as a stage over the in-memory sheet frames, in registration order (UHC,
+# Cigna, Availity, the order the SF_Union_* scripts were run in), and every stage sees the sheets
+# as the previous one left them, so the workbook and the active-email CSVs come out the same as
+# from back-to-back runs of the single-portal scripts.
+
+def _read_frame(sf_book, frames, sheet_name):
+    if sheet_name in frames:
+        return frames[sheet_name].copy()
+    return sf_book.read_sheet(sheet_name)
+
+def run_portal(adapter, roster, sf_book, frames, changed_columns):
+    """Add the adapter's column to every sheet it handles; return its active-email CSV frame.
+
+    Sheets are read from `frames` (sheets changed by earlier stages) or the workbook, and the
+    changed ones are stored back into `frames`, with the columns written into changed_columns.
+    Every job for a sheet starts from the sheet as this stage found it; the last job's result
+    is kept.
+    """
+    results = {}
+    row_frames = []
+    for sheet_name, job in adapter.sheet_jobs(sf_book.sheetnames):
+        if sheet_name not in sf_book.sheetnames:
+            print(f"Warning: Sheet '{sheet_name}' not found. Skipping.")
+            continue
+
+        try:
+            print(f"Processing sheet: {sheet_name}")
+            sf_df = _read_frame(sf_book, frames, sheet_name)
+        except Exception as e:
+            print(f"Error reading sheet '{sheet_name}': {str(e)}. Skipping.")
+            continue
+
+        if 'EMAIL' not in sf_df.columns:
+            print(f"'EMAIL' column not found in {sheet_name}. Skipping.")
+            continue
+
+        sf_df['EMAIL'] = sf_df['EMAIL'].str.lower().str.strip()
+        try:
+            sf_df[adapter.column] = adapter.status(sf_df['EMAIL'], roster, job)
+        except Exception as e:
+            print(f"Error applying status for sheet '{sheet_name}': {str(e)}. Skipping.")
+            continue
+
+        if adapter.move_column_last:
+            sf_df = sf_df[[col for col in sf_df.columns if col != adapter.column] + [adapter.column]]
+        results[sheet_name] = sf_df
+        changed_columns.setdefault(sheet_name, []).extend(
+            col for col in ('EMAIL', adapter.column) if col not in changed_columns[sheet_name]
+        )
+        row_frames.append(adapter.active_rows(sf_df, sheet_name, roster))
+
+    frames.update(results)
+    return adapter.build_csv(row_frames, roster)
+
+def reconcile_portals(sf_path, portal_paths):
+    """Add the column of every portal in portal_paths ({portal name: roster export path}) to the
+    SF workbook, save it once and write each portal's active-email CSV.
+
+    Rosters are read before the workbook is touched, so a bad export leaves it unchanged.
+    """
+    adapters = [get_portal(name) for name in portal_paths]
+    adapters.sort(key=lambda adapter: list(PORTAL_ADAPTERS).index(adapter.name))
+    rosters = {}
+    for adapter in adapters:
+        print(f"Reading {adapter.label} roster...")
+        rosters[adapter.name] = adapter.load_roster(portal_paths[adapter.name])
+
+    sf_book = SFWorkbook(sf_path)
+    frames = {}
+    changed_columns = {}
+    csv_frames = {}
+    for adapter in adapters:
+        csv_frames[adapter.name] = run_portal(adapter, rosters[adapter.name], sf_book, frames, changed_columns)
+
+    # Only the EMAIL and portal columns change, so they are written into the existing sheets
+    for sheet_name in sf_book.sheetnames:
+        if sheet_name in frames:
+            sf_book.write_sheet(sheet_name, frames[sheet_name], changed_columns[sheet_name])
+    sf_book.save()
+    print("All sheets updated successfully.")
+
+    for adapter in adapters:
+        adapter.write_csv(sf_path, csv_frames[adapter.name])
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+# === Vectorized portal status mapping ===
+# Turns a sheet's EMAIL column into the portal result column in one shot: the emails are looked up
+# in the roster with Series.map and np.select picks the outcome, instead of a Python call per row.
+# The EMAIL column must already be lower-cased and stripped, as the union scripts do on read.
+
+USER_NOT_FOUND = "Success - User not found"
+
+def build_status_lookup(emails, statuses):
+    """Email -> status Series; for repeated emails the last row wins, like set_index().to_dict()."""
+    lookup = pd.Series(np.asarray(statuses, dtype=object), index=np.asarray(emails, dtype=object))
+    return lookup[~lookup.index.duplicated(keep="last")]
+
+def _email_keys(emails):
+    # The per-row checks did str(email), so a missing email was looked up as "nan"
+    keys = emails.astype(object)
+    missing = keys.isna()
+    if missing.any():
+        keys = keys.where(~missing, keys[missing].map(str))
+    return keys
+
+def _result(values, emails):
+    return pd.Series(values, index=emails.index, dtype=object)
+
+def uhc_status(emails, lookup):
+    """UHC column: not found / already deactivated (status Inactive), else the email itself."""
+    keys = _email_keys(emails)
+    found = keys.isin(lookup.index)
+    inactive = keys.map(lookup).astype(str).str.lower().eq("inactive")
+    return _result(np.select(
+        [~found, inactive.to_numpy(dtype=bool)],
+        [USER_NOT_FOUND, "Success - User found and already deactivated"],
+        default=keys,
+    ), emails)
+
+def cigna_status(emails, lookup):
+    """CIGNA column: not found, else the email itself."""
+    keys = _email_keys(emails)
+    return _result(np.where(keys.isin(lookup.index), keys, USER_NOT_FOUND), emails)
+
+def availity_status(emails, org_lookup, global_lookup):
+    """Availity column from the org's status, falling back to the status in any org.
+
+    An empty status counts as missing. Statuses must already be stripped and upper-cased.
+    """
+    keys = _email_keys(emails)
+    org_status = keys.map(org_lookup).astype(object)
+    global_status = keys.map(global_lookup).astype(object)
+    # A blank status falls through to the next lookup; a missing one (NaN) does not and reads "NAN"
+    use_org = keys.isin(org_lookup.index) & (org_status != "")
+    found = (use_org | (keys.isin(global_lookup.index) & (global_status != ""))).to_numpy()
+    status = org_status.where(use_org, global_status)
+    status = status.where(status.notna(), "NAN")
+    status_values = status.to_numpy(dtype=object)
+    return _result(np.select(
+        [
+            ~found,
+            status_values == "DEACTIVATED",
+            status_values == "EXPIRED INVITATION",
+            status_values == "PENDING INVITATION",
+            (status_values == "ACTIVE") | (status_values == "LOCKED"),
+        ],
+        [
+            USER_NOT_FOUND,
+            "Success - Deactivated",
+            "Success - Expired Invitation",
+            "Success - There is no option to deactivate for this status currently",
+            keys,
+        ],
+        default="Unrecognized Status: " + status.astype(str),
+    ), emails)
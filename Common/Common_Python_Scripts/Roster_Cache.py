@@ -0,0 +1,105 @@
+import os
+import hashlib
+import pickle
+
+import pandas as pd
+
+# === On-disk cache of built roster indexes ===
+# Operators rerun the union scripts against the same portal export while they fix the SF workbook.
+# The normalized roster index each adapter builds (email -> status lookups, email -> markets/orgs)
+# is pickled under a key made of the portal name, a hash of the adapter settings build_roster() reads
+# (roster columns, Availity's org_to_sheet) and the SHA-256 of the export's bytes, so a rerun against
+# an unchanged export with unchanged settings skips parsing it. Loading a cache file refreshes its mtime, and once
+# the cache grows past its size limit the least recently used files are removed.
+# SF_ROSTER_CACHE=0 turns it off; SF_ROSTER_CACHE_DIR and SF_ROSTER_CACHE_MB move and size it.
+# Entries are plain pickles, so the directory must only be writable by the operator's account.
+
+CACHE_VERSION = 1  # bump when a build_roster() changes what it returns
+DEFAULT_CACHE_MB = 256
+HASH_CHUNK_BYTES = 1024 * 1024
+
+def roster_cache_enabled():
+    return os.environ.get("SF_ROSTER_CACHE", "1") != "0"
+
+def roster_cache_dir():
+    return os.environ.get("SF_ROSTER_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".sf_roster_cache")
+
+def _cache_limit_bytes():
+    try:
+        return int(float(os.environ.get("SF_ROSTER_CACHE_MB", DEFAULT_CACHE_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_CACHE_MB * 1024 * 1024
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def roster_cache_key(portal_name, roster_path, build_inputs=()):
+    """Cache key for the portal's roster built from roster_path with build_inputs, or None when caching is off."""
+    if not roster_cache_enabled():
+        return None
+    inputs_digest = hashlib.sha256(repr(build_inputs).encode("utf-8")).hexdigest()[:16]
+    try:
+        return f"{portal_name}-{inputs_digest}-{file_sha256(roster_path)}"
+    except OSError:
+        return None  # let the roster reader report the unreadable file
+
+def _cache_path(key):
+    return os.path.join(roster_cache_dir(), f"{key}.pkl")
+
+def load_cached_roster(key):
+    """The cached roster for key, or None on a miss or an unreadable/stale entry."""
+    if key is None:
+        return None
+    path = _cache_path(key)
+    try:
+        with open(path, "rb") as f:
+            entry = pickle.load(f)
+        if entry.get("version") != CACHE_VERSION or entry.get("pandas") != pd.__version__:
+            return None
+        os.utime(path)  # mark as recently used
+        return entry["roster"]
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Warning: ignoring roster cache entry {path}: {e}")
+        return None
+
+def store_cached_roster(key, roster):
+    """Cache roster under key, then evict least recently used entries over the size limit."""
+    if key is None:
+        return
+    directory = roster_cache_dir()
+    path = _cache_path(key)
+    tmp_path = path + ".tmp"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": CACHE_VERSION, "pandas": pd.__version__, "roster": roster},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        _evict(directory, keep=path)
+    except Exception as e:
+        print(f"Warning: could not cache roster: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _evict(directory, keep):
+    entries = []
+    for name in os.listdir(directory):
+        if name.endswith(".pkl"):
+            entry_path = os.path.join(directory, name)
+            st = os.stat(entry_path)
+            entries.append((st.st_mtime, st.st_size, entry_path))
+    total = sum(size for _, size, _ in entries)
+    limit = _cache_limit_bytes()
+    for _, size, entry_path in sorted(entries):
+        if total <= limit:
+            break
+        if entry_path == keep:
+            continue
+        os.remove(entry_path)
+        total -= size
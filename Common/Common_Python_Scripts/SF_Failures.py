@@ -0,0 +1,60 @@
+import re
+
+import pandas as pd
+
+# === Failure marking for unresolved portal emails ===
+# After the bot posts its deactivation results, a portal result cell that still holds an email was
+# left unresolved and is rewritten to "Failure - Action required". Only the portal result columns
+# are checked: each is matched with one regex over its values and only the hits are written back.
+
+EMAIL_REGEX = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+# Portal result columns (normalized header) where a leftover email means the bot did not resolve it
+PORTAL_COLUMNS = ["UHC", "CIGNA", "AVAILITY"]
+FAILURE_TEXT = "Failure - Action required"
+
+def mark_sheet_failures(ws):
+    """Rewrite the leftover emails in the openpyxl sheet's portal columns; return how many.
+
+    Empty sheets and sheets without an EMAIL column are skipped (with a message) and return 0.
+    """
+    # Skip if sheet empty
+    if ws.max_row < 2 or ws.max_column < 1:
+        print(f"Sheet {ws.title} is empty. Skipping.")
+        return 0
+
+    # Extract headers from first row
+    headers = [str(cell.value).strip() if cell.value else "" for cell in ws[1]]
+    headers_upper = [h.upper().replace(" ", "_") for h in headers]
+
+    if "EMAIL" not in headers_upper:
+        print(f"No 'EMAIL' column in {ws.title}. Skipping.")
+        return 0
+
+    # Check each portal column with one regex match over its values (skip header row)
+    # and write back only the cells that still hold an email
+    portal_col_idxs = [idx for idx, h in enumerate(headers_upper, start=1) if h in PORTAL_COLUMNS]
+    hits = 0
+    for col_idx in portal_col_idxs:
+        (values,) = ws.iter_cols(min_col=col_idx, max_col=col_idx, min_row=2, max_row=ws.max_row, values_only=True)
+        texts = pd.Series(values, dtype=object).fillna("").astype(str).str.strip()
+        for offset in texts.index[texts.str.match(EMAIL_REGEX)]:
+            ws.cell(row=offset + 2, column=col_idx).value = FAILURE_TEXT
+            hits += 1
+    return hits
+
+def mark_failures(work_book, sheet_names):
+    """Run mark_sheet_failures over the workbook's named sheets; return the sheets it changed.
+
+    A sheet that fails part-way is counted as changed, since some of its cells may already have
+    been rewritten, so callers never keep a stale copy of it (such as its sidecar frame).
+    """
+    changed_sheets = []
+    for sheet_name in sheet_names:
+        print(f"Processing sheet: {sheet_name}")
+        try:
+            if mark_sheet_failures(work_book[sheet_name]):
+                changed_sheets.append(sheet_name)
+        except Exception as sheet_err:
+            print(f"Error processing sheet {sheet_name}: {sheet_err}")
+            changed_sheets.append(sheet_name)
+    return changed_sheets
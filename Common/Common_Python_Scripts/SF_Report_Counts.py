@@ -0,0 +1,70 @@
+from collections import namedtuple
+
+# === Outcome counting for the *_Report summary sheets ===
+# The report scripts counted each outcome with its own case-insensitive str.contains scan over the
+# whole portal column. count_outcomes() normalizes the column once, collapses it with a single
+# value_counts, and runs each outcome's test only on the distinct values (a market sheet holds a
+# handful of result strings), so a sheet costs one pass however many outcome columns there are.
+# The counts are exactly what the per-outcome scans gave, including cells matching two outcomes.
+
+def count_outcomes(values, matchers):
+    """Count the cells of values matching each matcher, in matcher order.
+
+    A matcher is a regex tested with str.contains(case=False), or a callable taking a Series of
+    distinct (stripped) cell texts and returning a boolean mask. Cells are compared as str(cell),
+    so missing cells read "nan".
+    """
+    counts = values.astype(str).str.strip().value_counts()
+    distinct = counts.index.to_series(index=range(len(counts)))
+    totals = []
+    for matcher in matchers:
+        if callable(matcher):
+            mask = matcher(distinct)
+        else:
+            mask = distinct.str.contains(matcher, case=False, na=False)
+        totals.append(int(counts.to_numpy()[mask.to_numpy(dtype=bool)].sum()))
+    return totals
+
+def failure_required_action(texts):
+    """Cigna's failure test: "Failure - Required Action" in any case, hyphens and spacing ignored."""
+    return (
+        texts
+        .str.lower()
+        .str.replace('-', '', regex=False)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.contains("failure required action", na=False)
+    )
+
+# === Per-portal report layouts ===
+# The columns of UHC_Report, Cigna_Report and Availity_Report (after Market and SF_COUNT), with the
+# matcher counted into each. Used by the portal report scripts and the combined report.
+
+PortalReport = namedtuple("PortalReport", ["sheet_name", "column", "skip_markets", "outcomes"])
+
+PORTAL_REPORTS = [
+    PortalReport("UHC_Report", "UHC", ["UL", "UM", "NE", "UG", "CW", "AG", "OV", "Other"], [
+        ('UHC_UserNotFound', r'Success - User not found'),
+        ('UHC_UserFoundandAlreadyDeactivated', r'Success - User found and already deactivated'),
+        ('UHC_UserFoundandDeactivated', r'Success - User found and deactivated'),
+        ('UHC_Failure', r'Failure - Action Required'),
+    ]),
+    PortalReport("Cigna_Report", "CIGNA", ["UL", "UM", "NE", "UG", "CW", "Other"], [
+        ('Cigna_UserNotFound', r'Success - User not found'),
+        ('Cigna_UserFoundandDeactivated', r'Success - User found and deactivated'),
+        ('Cigna_Failure', failure_required_action),
+    ]),
+    PortalReport("Availity_Report", "Availity", ["UL", "UM", "NE", "UG", "CW", "Other"], [
+        ('Availity_UserNotFound', r'Success - User not found'),
+        ('Availity_Deactivated', r'Success - Deactivated'),
+        ('Availity_UserFoundandDeactivated', r'Success - User found and deactivated'),
+        ('Availity_ExpiredInvitation', r'Success - Expired Invitation'),
+        ('Availity_PendingInvitation', r'Success - There is no option to deactivate for this status currently'),
+        ('Availity_Failure', r'Failure - Action Required'),
+    ]),
+]
+
+def portal_report_counts(report, sheet_name, values):
+    """The report's outcome counts for one market sheet; zeros for skipped markets or no column."""
+    if sheet_name in report.skip_markets or values is None:
+        return [0] * len(report.outcomes)
+    return count_outcomes(values, [matcher for _, matcher in report.outcomes])
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from SF_Sidecar import load_sidecar, read_sheet
+
+# === Read-only sheet scanning for the *_Report scripts ===
+# A report only needs each market sheet's row count and one portal column, yet the report scripts
+# loaded the workbook for editing and parsed every sheet into a DataFrame. ReportScan takes those
+# from the sidecar when it is current; otherwise it opens the workbook read-only and streams each
+# sheet's rows, keeping only the header and the portal column(s). Row counts follow pd.read_excel:
+# trailing blank rows are not counted, blank rows between records are. A sheet whose first row is
+# blank (pandas would look further down for the header) is read with pandas instead.
+# The scripts then load the workbook for editing only to insert their report sheet.
+
+def _is_blank(value):
+    return value is None or value == ""
+
+class ReportScan:
+    """Row counts and portal column values of the SF workbook's sheets."""
+    def __init__(self, sf_path):
+        self.path = sf_path
+        self.sidecar = load_sidecar(sf_path)
+        # Full sheet frames on hand (sidecar or pandas reads), for the sidecar written after the save
+        self.frames = dict(self.sidecar.frames) if self.sidecar is not None else {}
+        self._workbook = None
+        if self.sidecar is not None:
+            self.sheetnames = list(self.sidecar.sheetnames)
+        else:
+            self._workbook = load_workbook(sf_path, read_only=True)
+            self.sheetnames = self._workbook.sheetnames
+
+    def column(self, sheet_name, column):
+        """(row count, column values) for the sheet; values is None when it has no such column."""
+        total, values = self.columns(sheet_name, [column])
+        return total, values.get(column)
+
+    def columns(self, sheet_name, columns):
+        """(row count, {column: values}) for those of columns the sheet has, from one pass over it."""
+        if sheet_name not in self.frames:
+            scanned = self._stream_columns(sheet_name, columns)
+            if scanned is not None:
+                return scanned
+            self.frames[sheet_name] = read_sheet(self.path, sheet_name, self.sidecar)
+        df = self.frames[sheet_name]
+        return len(df), {column: df[column] for column in columns if column in df.columns}
+
+    def _stream_columns(self, sheet_name, columns):
+        if self._workbook is None:
+            self._workbook = load_workbook(self.path, read_only=True)
+        rows = self._workbook[sheet_name].iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        if all(_is_blank(value) for value in header):
+            return None
+        col_indexes = {column: header.index(column) for column in columns if column in header}
+
+        values = {column: [] for column in col_indexes}
+        total = 0
+        for row_number, row in enumerate(rows, start=1):
+            if not all(_is_blank(value) for value in row):
+                total = row_number
+            for column, col_index in col_indexes.items():
+                value = row[col_index] if col_index < len(row) else None
+                values[column].append(np.nan if _is_blank(value) else value)
+        return total, {
+            column: pd.Series(column_values[:total], dtype=object, name=column)
+            for column, column_values in values.items()
+        }
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
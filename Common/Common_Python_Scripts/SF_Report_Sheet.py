@@ -0,0 +1,42 @@
+from openpyxl.styles import Font, PatternFill, Border, Side
+
+# === *_Report summary sheet writer ===
+# Header row, one row per market and a green 'ALL Markets' totals row; every *_Report sheet is built
+# with it.
+
+def write_report_sheet(wb, sheet_name, index, headers, summary_data):
+    """Replace sheet_name with the summary rows plus an 'ALL Markets' totals row; return all rows."""
+    if sheet_name in wb.sheetnames:
+        del wb[sheet_name]
+    main_ws = wb.create_sheet(sheet_name, index)
+    main_ws.append(headers)
+
+    # Style setup
+    bold_font = Font(bold=True)
+    green_fill = PatternFill(start_color='C6EFCE', end_color='C6EFCE', fill_type='solid')
+    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                         top=Side(style='thin'), bottom=Side(style='thin'))
+
+    for cell in main_ws[1]:
+        cell.font = bold_font
+        cell.border = thin_border
+
+    for row in summary_data:
+        main_ws.append(row)
+
+    # Add totals row
+    totals = ['ALL Markets'] + [sum(row[i] for row in summary_data) for i in range(1, len(headers))]
+    main_ws.append(totals)
+
+    # Apply styling to totals row
+    for cell in main_ws[main_ws.max_row]:
+        cell.fill = green_fill
+        cell.font = bold_font
+        cell.border = thin_border
+
+    # Apply borders to all other data rows
+    for row in main_ws.iter_rows(min_row=2, max_row=main_ws.max_row - 1, min_col=1, max_col=len(headers)):
+        for cell in row:
+            cell.border = thin_border
+
+    return summary_data + [totals]
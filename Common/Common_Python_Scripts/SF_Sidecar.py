@@ -0,0 +1,172 @@
+import os
+import json
+import shutil
+from collections import namedtuple
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+# pyarrow is optional: without it no sidecar is written and every reader uses the XLSX
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+MANIFEST_NAME = "manifest.json"
+STREAM_BATCH_ROWS = 10000
+
+SidecarData = namedtuple("SidecarData", ["sheetnames", "frames"])
+
+# === Columnar sidecar for the SF workbook ===
+# Every stage that saves the workbook also writes its sheets as Feather (Arrow IPC) files in
+# <workbook>.sidecar/, with a manifest holding the workbook's size and mtime. The next stage reads
+# the sidecar instead of parsing the XLSX, but only while that stamp still matches. Once someone
+# else (an operator, the deactivation bot) saves the workbook the sidecar is ignored.
+# Set SF_SIDECAR=0 to turn it off.
+
+def sidecar_enabled():
+    return pa is not None and os.environ.get("SF_SIDECAR", "1") != "0"
+
+def sidecar_dir(xlsx_path):
+    return xlsx_path + ".sidecar"
+
+def _workbook_stamp(xlsx_path):
+    st = os.stat(xlsx_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def invalidate_sidecar(xlsx_path):
+    # Removing the manifest first means a half-written sidecar is never picked up
+    manifest_path = os.path.join(sidecar_dir(xlsx_path), MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+def _excel_like(df):
+    # Give the frame the types pd.read_excel would produce for the saved sheet: integral floats
+    # come back as ints, and cell text goes through the same TextParser type inference
+    # ("123" -> 123, "" / "NA" -> NaN), so readers see identical frames either way.
+    rows = df.astype(object).where(df.notna(), None).values.tolist()
+    rows = [[int(v) if isinstance(v, float) and v.is_integer() else v for v in row] for row in rows]
+    return TextParser([list(df.columns)] + rows, header=0).read()
+
+def _write_manifest(xlsx_path, sheetnames, files, raw_sheets=()):
+    manifest = {"workbook": _workbook_stamp(xlsx_path), "sheetnames": list(sheetnames), "sheets": files,
+                "raw_sheets": list(raw_sheets)}
+    with open(os.path.join(sidecar_dir(xlsx_path), MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+def write_sidecar(xlsx_path, frames, sheetnames):
+    """Write frames ({sheet name: DataFrame}) next to the just-saved workbook.
+
+    sheetnames is the workbook's full sheet order; sheets missing from frames are read from
+    the XLSX by consumers. Returns True when the sidecar was written.
+    """
+    if not sidecar_enabled():
+        return False
+    directory = sidecar_dir(xlsx_path)
+    try:
+        invalidate_sidecar(xlsx_path)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+        files = {}
+        for index, sheet_name in enumerate(sheetnames):
+            if sheet_name not in frames:
+                continue
+            file_name = f"{index:03d}.feather"  # sheet names may not be valid file names
+            _excel_like(frames[sheet_name]).to_feather(os.path.join(directory, file_name))
+            files[sheet_name] = file_name
+        _write_manifest(xlsx_path, sheetnames, files)
+        return True
+    except Exception as e:
+        print(f"Warning: Columnar sidecar not written ({e}); later stages will read the XLSX.")
+        invalidate_sidecar(xlsx_path)
+        return False
+
+def load_sidecar(xlsx_path):
+    """Return SidecarData(sheetnames, frames) when a current sidecar exists, else None."""
+    if not sidecar_enabled():
+        return None
+    directory = sidecar_dir(xlsx_path)
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["workbook"] != _workbook_stamp(xlsx_path):
+            return None
+        frames = {
+            sheet_name: feather.read_feather(os.path.join(directory, file_name))
+            for sheet_name, file_name in manifest["sheets"].items()
+        }
+        # Streamed sheets are stored as plain text; type them the way read_excel would
+        for sheet_name in manifest.get("raw_sheets", []):
+            frames[sheet_name] = _excel_like(frames[sheet_name])
+    except (OSError, ValueError, KeyError, pa.ArrowException):
+        return None
+    print(f"Using columnar sidecar for {os.path.basename(xlsx_path)} ({len(frames)} sheets).")
+    return SidecarData(manifest["sheetnames"], frames)
+
+def read_sheet(xlsx_path, sheet_name, sidecar=None):
+    """Read one sheet, from the sidecar when it holds it, otherwise from the XLSX."""
+    if sidecar is not None and sheet_name in sidecar.frames:
+        return sidecar.frames[sheet_name].copy()
+    return pd.read_excel(xlsx_path, sheet_name=sheet_name, engine="openpyxl")
+
+class SidecarStreamWriter:
+    """Sidecar writer for string-only sheets that are produced row by row.
+
+    Rows are buffered per sheet and flushed as Arrow record batches, so memory stays flat
+    like the write-only workbook it mirrors. The text is typed when the sidecar is loaded.
+    Call close() after the workbook is saved.
+    """
+    def __init__(self, xlsx_path, columns):
+        self.xlsx_path = xlsx_path
+        self.columns = list(columns)
+        self.directory = sidecar_dir(xlsx_path)
+        self.schema = pa.schema([(c, pa.string()) for c in self.columns])
+        self.writers = {}
+        self.files = {}
+        self.buffers = {}
+        if os.path.exists(xlsx_path):
+            invalidate_sidecar(xlsx_path)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def append(self, sheet_name, row):
+        buffer = self.buffers.setdefault(sheet_name, [])
+        buffer.append(list(row))
+        if len(buffer) >= STREAM_BATCH_ROWS:
+            self._flush(sheet_name)
+
+    def _flush(self, sheet_name):
+        buffer = self.buffers[sheet_name]
+        if sheet_name not in self.writers:
+            file_name = f"{len(self.writers):03d}.feather"
+            self.files[sheet_name] = file_name
+            self.writers[sheet_name] = pa.ipc.new_file(os.path.join(self.directory, file_name), self.schema)
+        arrays = [pa.array(list(col), pa.string()) for col in zip(*buffer)] if buffer else \
+            [pa.array([], pa.string()) for _ in self.columns]
+        self.writers[sheet_name].write_batch(pa.record_batch(arrays, schema=self.schema))
+        buffer.clear()
+
+    def close(self, sheetnames, titles=None):
+        """Finish the sheet files and write the manifest for the saved workbook.
+
+        titles maps the names rows were appended under to their sheet titles in the workbook,
+        for sheets openpyxl renamed.
+        """
+        try:
+            for sheet_name in self.buffers:
+                self._flush(sheet_name)
+            for writer in self.writers.values():
+                writer.close()
+            titles = titles or {}
+            by_title = {titles.get(s, s): file_name for s, file_name in self.files.items()}
+            files = {s: by_title[s] for s in sheetnames if s in by_title}
+            _write_manifest(self.xlsx_path, sheetnames, files, raw_sheets=files)
+        except Exception as e:
+            print(f"Warning: Columnar sidecar not written ({e}); later stages will read the XLSX.")
+            invalidate_sidecar(self.xlsx_path)
+
+    def abort(self):
+        for writer in self.writers.values():
+            writer.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
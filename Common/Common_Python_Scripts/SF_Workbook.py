@@ -0,0 +1,90 @@
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.dataframe import dataframe_to_rows
+
+from SF_Sidecar import load_sidecar, write_sidecar
+
+# === Single-load access to the SF workbook ===
+# The union scripts used to load_workbook() the file for writing and then pd.read_excel() it once
+# per market sheet, re-opening and re-parsing the whole zip each time. SFWorkbook parses the file
+# once: sheets come from the columnar sidecar when it is current, otherwise pandas reads them from
+# the already-loaded openpyxl workbook. Reads always see the sheet as it was in the file (a sheet
+# can be processed by several jobs), and frames of rewritten sheets are kept for the next sidecar.
+# When the caller says which columns it changed and the sheet's other columns did not move, only
+# those columns are written into the existing sheet; otherwise the sheet is rewritten whole.
+
+class SFWorkbook:
+    """The SF workbook, loaded once for reading sheets as DataFrames and writing them back."""
+    def __init__(self, path):
+        self.path = path
+        self.workbook = load_workbook(path)
+        self.sidecar = load_sidecar(path)
+        self.written_frames = {}
+        self._excel_file = None
+        self._loaded_frames = {}
+        self._read_columns = {}
+
+    @property
+    def sheetnames(self):
+        return self.workbook.sheetnames
+
+    def read_sheet(self, sheet_name):
+        """Return the sheet as saved in the file, as pd.read_excel(path, sheet_name) would."""
+        if self.sidecar is not None and sheet_name in self.sidecar.frames:
+            df = self.sidecar.frames[sheet_name].copy()
+        elif sheet_name in self._loaded_frames:
+            df = self._loaded_frames[sheet_name].copy()
+        elif sheet_name in self.written_frames:
+            # Already rewritten in memory before it was ever read; the file still has the original
+            return pd.read_excel(self.path, sheet_name=sheet_name, engine="openpyxl")
+        else:
+            if self._excel_file is None:
+                self._excel_file = pd.ExcelFile(self.workbook, engine="openpyxl")
+            self._loaded_frames[sheet_name] = self._excel_file.parse(sheet_name)
+            df = self._loaded_frames[sheet_name].copy()
+        self._read_columns.setdefault(sheet_name, list(df.columns))
+        return df
+
+    def write_sheet(self, sheet_name, df, changed_columns=None):
+        """Write df (header row plus values) to the sheet.
+
+        changed_columns names the columns that differ from the sheet as read; when given, and the
+        sheet's columns only had new ones appended, just those columns are written in place.
+        """
+        work_sheet = self.workbook[sheet_name]
+        if changed_columns is not None and self._can_write_in_place(work_sheet, df, changed_columns):
+            for col in changed_columns:
+                self._write_column(work_sheet, df, col)
+        else:
+            work_sheet.delete_rows(1, work_sheet.max_row)
+            for row in dataframe_to_rows(df, index=False, header=True):
+                work_sheet.append(row)
+        self.written_frames[sheet_name] = df.copy()  # callers may keep changing their frame
+
+    def _can_write_in_place(self, work_sheet, df, changed_columns):
+        read_columns = self._read_columns.get(work_sheet.title)
+        if read_columns is None or list(df.columns[:len(read_columns)]) != read_columns:
+            return False
+        if not all(isinstance(df.columns.get_loc(col), int) for col in changed_columns):
+            return False  # duplicate column names
+        # The header row must be the one pandas read (no leading blank rows, no renamed duplicates)
+        header = next(work_sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        header = list(header) + [None] * (len(read_columns) - len(header))
+        return all(
+            value == col or (value is None and str(col).startswith("Unnamed:"))
+            for value, col in zip(header, read_columns)
+        )
+
+    def _write_column(self, work_sheet, df, col):
+        column_index = df.columns.get_loc(col) + 1
+        work_sheet.cell(row=1, column=column_index).value = col
+        for row_index, (value,) in enumerate(dataframe_to_rows(df[[col]], index=False, header=False), start=2):
+            work_sheet.cell(row=row_index, column=column_index).value = value
+        # Clear leftovers below the data, as a full rewrite would
+        for (cell,) in work_sheet.iter_rows(min_row=len(df) + 2, min_col=column_index, max_col=column_index):
+            cell.value = None
+
+    def save(self):
+        self.workbook.save(self.path)
+        frames = {**(self.sidecar.frames if self.sidecar else {}), **self.written_frames}
+        write_sidecar(self.path, frames, self.workbook.sheetnames)
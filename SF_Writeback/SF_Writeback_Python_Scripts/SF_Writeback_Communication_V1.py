@@ -4,6 +4,10 @@ import os
 import time
 from datetime import datetime
 
+# Shared helpers live in Common/Common_Python_Scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Common", "Common_Python_Scripts"))
+from SF_Sidecar import load_sidecar, read_sheet
+
 # Markets to skip
 skip_markets = ["UL", "UM", "NE", "UG", "CW", "Other"]
 
@@ -47,21 +51,25 @@ wait_for_file(report_path)
 try:
     all_data = []
 
-    # Load Excel file
-    try:
-        xls = pd.ExcelFile(report_path)
-    except Exception as e:
-        print(f"Error: Unable to open Excel file -> {e}")
-        sys.exit(1)
+    # Load Excel file (the columnar sidecar already lists the sheets when it is current)
+    sidecar = load_sidecar(report_path)
+    if sidecar is not None:
+        sheet_names = sidecar.sheetnames
+    else:
+        try:
+            sheet_names = pd.ExcelFile(report_path).sheet_names
+        except Exception as e:
+            print(f"Error: Unable to open Excel file -> {e}")
+            sys.exit(1)
 
-    for sheet_name in xls.sheet_names:
+    for sheet_name in sheet_names:
         if "report" in sheet_name.lower():
             continue
         if sheet_name in skip_markets:
             continue
 
         try:
-            df = pd.read_excel(report_path, sheet_name=sheet_name, engine="openpyxl")
+            df = read_sheet(report_path, sheet_name, sidecar)
         except Exception as e:
             print(f"Error reading sheet '{sheet_name}': {e}")
             continue
@@ -1,74 +1,205 @@
 import os
 import sys
 import json
+import time
+import hashlib
+import sqlite3
+import argparse
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from openpyxl import Workbook
 import re
 
+# Shared helpers live in Common/Common_Python_Scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Common", "Common_Python_Scripts"))
+from SF_Sidecar import SidecarStreamWriter, sidecar_enabled, write_sidecar
+
 skip_markets = ["UL", "UM", "NE", "UG", "MG", "CW", "Other"]
 
+COLUMNS = ["FN", "LN", "EMAIL", "CC", "Market", "SF_CaseNumber", "SF_ID", "SF_CreatedDate"]
+RECORD_FIELDS = ["Subject", "Description", "CreatedDate", "CaseNumber", "Id"]
+
+MSO_CC_REGEX = re.compile(r'^MS\d+', re.IGNORECASE)
+
+# === Description fields ===
+def _label_value(description, label, terminator):
+    # description.split(label)[1].split(terminator)[0] ('' when the label is missing), without
+    # building the split lists: the text after the first label, up to the next label or terminator
+    return description.partition(label)[2].partition(label)[0].partition(terminator)[0]
+
+def parse_description(description):
+    """Return the (email, care center) of a case Description, '' when absent.
+
+    A field is only read when its terminator label appears somewhere in the text, and the
+    care center is the first word of its value, as with the split() chains this replaced.
+    """
+    email = ""
+    if "Entity:" in description:
+        email = _label_value(description, "Email:", "Entity:").strip()
+    cc = ""
+    if "Job Title:" in description:
+        cc_words = _label_value(description, "Care Center:", "Job Title:").split(None, 1)
+        if cc_words:
+            cc = cc_words[0]
+    return email, cc
+
 # === Extract market code ===
 def get_market_from_cc(cc):
     if len(cc) >= 2 and cc[0].isalpha(): 
         # Check if cc matches MSxxx pattern (MS followed by numbers)
-        if re.match(r'^MS\d+', cc, re.IGNORECASE):
+        if MSO_CC_REGEX.match(cc):
             return "MSO"
         return cc[:2]  # First two characters as market code
     return "Other"  # Default if not found
 
-# === Argument: JSON file path ===
-if len(sys.argv) != 2:
-    print("Usage: python json_to_excel_by_market.py <json_file_path>")
-    sys.exit(1)
+def get_market_from_cc_series(cc):
+    """Vectorized get_market_from_cc over a Series of care center codes."""
+    valid = (cc.str.len() >= 2) & cc.str[:1].str.isalpha()
+    mso = cc.str.match(MSO_CC_REGEX)
+    return pd.Series(np.select([valid & mso, valid], ["MSO", cc.str[:2]], default="Other"), index=cc.index)
 
-json_file = sys.argv[1]
-if not os.path.isfile(json_file):
-    print(f"JSON file not found: {json_file}")
-    sys.exit(1)
+# === Incremental JSON reader ===
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+JSON_DELIMITERS = " \t\n\r,:]}"
 
-# === Load JSON data ===
-try:
+def iter_json_records(json_file, chunk_size=1 << 16):
+    """Yield records one at a time from a top-level list or a {"records": [...]} object.
+
+    The file is read in chunks and each record is decoded as soon as it is complete, so the
+    parser's memory use depends on the largest record rather than on the size of the export.
+    The extracted rows still accumulate per market unless they are streamed out (--write-only).
+    """
+    decoder = json.JSONDecoder()
     with open(json_file, 'r', encoding='utf-8') as f:
-        json_data = json.load(f)
-except (json.JSONDecodeError, FileNotFoundError, OSError) as e:
-    print(f"Error reading JSON file: {e}")
-    sys.exit(1)
-
-if isinstance(json_data, list):
-    records = json_data  # If json_data is a list, use it directly
-elif isinstance(json_data, dict):
-    records = json_data.get("records", [])
-else:
-    print("Unexpected JSON structure.")
-    sys.exit(1)
-
-print(f"Loaded {len(records)} records from JSON.")
-
-# === Generate market list dynamically ===
-markets = set()  # Use a set to avoid duplicates
-for record in records:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            # Grow the read size with the pending buffer so a huge record is not re-decoded per chunk
+            nonlocal buf, pos, eof
+            chunk = f.read(max(chunk_size, len(buf) - pos))
+            if not chunk:
+                eof = True
+                return
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def peek():
+            # Skip whitespace and return the next character ('' at end of file)
+            nonlocal pos
+            while True:
+                pos = JSON_WHITESPACE.match(buf, pos).end()
+                if pos < len(buf) or eof:
+                    return buf[pos:pos + 1]
+                fill()
+
+        def next_value():
+            # Decode the next complete value, reading more input while it is truncated
+            nonlocal pos
+            peek()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    # A number cut at the chunk edge (e.g. "2." of "2.5") may continue in the next chunk
+                    if eof or (end < len(buf) and buf[end] in JSON_DELIMITERS):
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        def iter_array():
+            nonlocal pos
+            pos += 1  # consume '['
+            if peek() == "]":
+                pos += 1
+                return
+            while True:
+                yield next_value()
+                sep = peek()
+                pos += 1
+                if sep == "]":
+                    return
+                if sep != ",":
+                    raise ValueError(f"Expected ',' or ']' in records array, found {sep!r}")
+
+        start = peek()
+        if start == "[":
+            yield from iter_array()
+        elif start == "{":
+            pos += 1  # consume '{'
+            if peek() == "}":
+                return
+            while True:
+                key = next_value()
+                if peek() != ":":
+                    raise ValueError("Expected ':' after object key")
+                pos += 1
+                if key == "records" and peek() == "[":
+                    yield from iter_array()
+                else:
+                    next_value()  # other top-level keys (totalSize, done, ...) are skipped
+                sep = peek()
+                pos += 1
+                if sep == "}":
+                    return
+                if sep != ",":
+                    raise ValueError(f"Expected ',' or '}}' in JSON object, found {sep!r}")
+        else:
+            raise ValueError("Unexpected JSON structure.")
+
+def stream_records(json_file):
     try:
-        if not isinstance(record, dict):
-            continue
-        description = record.get("Description", "")
-        if not description or not isinstance(description, str):
-            continue
-        
-        if "Care Center:" in description and "Job Title:" in description:
-            care_center_part = description.split("Care Center:")[1].split("Job Title:")[0].strip()
-            if care_center_part:
-                care_center_words = care_center_part.split()
-                if care_center_words:
-                    care_center = care_center_words[0]
-                    market = get_market_from_cc(care_center)
-                    if market and market != "Other":
-                        markets.add(market)
-    except (IndexError, AttributeError, TypeError):
-        continue
-
-markets = sorted(markets)  # Convert to a sorted list
-market_data = {m: [] for m in markets}
-market_data["Other"] = []  # Add a catch-all for unknown/missing CC
+        yield from iter_json_records(json_file)
+    except (ValueError, OSError) as e:  # json.JSONDecodeError is a ValueError
+        print(f"Error reading JSON file: {e}")
+        sys.exit(1)
+
+# === CreatedDate formatting ===
+class CreatedDateNormalizer:
+    """Formats CreatedDate strings as MM-DD-YYYY, keeping the date as written (no timezone shift).
+
+    Values are parsed with datetime.fromisoformat. Formatting is the costly step and exports span
+    few distinct days, so the formatted string is memoized per calendar day. Values fromisoformat
+    rejects fall back to dateutil, which is imported only when such a value first shows up.
+    """
+    OUTPUT_FORMAT = "%m-%d-%Y"
+
+    def __init__(self):
+        self._formatted_days = {}  # date ordinal -> formatted date
+        self._dateutil_parser = None
+
+    def normalize(self, created_date_raw):
+        if not (created_date_raw and isinstance(created_date_raw, str)):
+            return ""
+        try:
+            # Handle different datetime formats
+            dt = datetime.fromisoformat(created_date_raw.replace("Z", "+00:00"))
+        except ValueError:
+            return self._parse_fallback(created_date_raw)
+        day = dt.toordinal()
+        formatted = self._formatted_days.get(day)
+        if formatted is None:
+            formatted = self._formatted_days[day] = dt.strftime(self.OUTPUT_FORMAT)
+        return formatted
+
+    def _parse_fallback(self, created_date_raw):
+        try:
+            # Try alternative parsing if fromisoformat fails
+            if self._dateutil_parser is None:
+                from dateutil import parser
+                self._dateutil_parser = parser
+            return self._dateutil_parser.parse(created_date_raw).strftime(self.OUTPUT_FORMAT)
+        except Exception:
+            return ""
+
+created_date_normalizer = CreatedDateNormalizer()
 
 # === Extraction function ===
 def extract_info(record):
@@ -102,50 +233,17 @@ def extract_info(record):
         except (IndexError, AttributeError, TypeError) as e:
             fn = ln = "Unknown"
 
-    # Email extraction
+    # Email and Care Center extraction
     email = ""
-    if description:
-        try:
-            if "Email:" in description and "Entity:" in description:
-                email_part = description.split("Email:")[1].split("Entity:")[0].strip()
-                if email_part:  # Only assign if not empty
-                    email = email_part
-        except (IndexError, AttributeError, TypeError):
-            email = ""
-
-    # Care Center extraction
     cc = ""
     market = "Other"
-    if description:
-        try:
-            if "Care Center:" in description and "Job Title:" in description:
-                cc_part = description.split("Care Center:")[1].split("Job Title:")[0].strip()
-                if cc_part:  # Check if not empty
-                    cc_words = cc_part.split()
-                    if cc_words:  # Check if split result is not empty
-                        care_center = cc_words[0]
-                        cc = care_center
-                        market = get_market_from_cc(cc)
-        except (IndexError, AttributeError, TypeError):
-            pass  # cc and market already set to defaults
+    if description and isinstance(description, str):
+        email, cc = parse_description(description)
+        if cc:
+            market = get_market_from_cc(cc)
 
     # CreatedDate formatting
-    created_date_formatted = ""
-    created_date_raw = record.get("CreatedDate", "")
-    if created_date_raw and isinstance(created_date_raw, str):
-        try:
-            # Handle different datetime formats
-            clean_date = created_date_raw.replace("Z", "+00:00")
-            dt = datetime.fromisoformat(clean_date)
-            created_date_formatted = dt.strftime("%m-%d-%Y")
-        except (ValueError, TypeError, AttributeError):
-            try:
-                # Try alternative parsing if fromisoformat fails
-                from dateutil import parser
-                dt = parser.parse(created_date_raw)
-                created_date_formatted = dt.strftime("%m-%d-%Y")
-            except:
-                created_date_formatted = ""
+    created_date_formatted = created_date_normalizer.normalize(record.get("CreatedDate", ""))
 
     # Safe case number processing
     case_number = ""
@@ -167,115 +265,500 @@ def extract_info(record):
         "SF_CreatedDate": created_date_formatted
     }
 
-# === Process records ===
-processed_count = 0
-error_count = 0
+# === Vectorized extraction (--engine pandas) ===
+def _label_values(descriptions, label, terminator):
+    # _label_value over a Series of descriptions
+    value = descriptions.str.partition(label, expand=False).str[2]
+    value = value.str.partition(label, expand=False).str[0]
+    return value.str.partition(terminator, expand=False).str[0]
+
+def extract_frame(records):
+    """Vectorized extract_info over a batch of records.
+
+    Returns a DataFrame with COLUMNS indexed by each record's position in the batch; records
+    that extract_info would fail on are left out. Records whose fields are not plain strings
+    go through extract_info itself so the output matches the per-record engine exactly.
+    """
+    plain_pos, plain, odd = [], [], []
+    for pos, record in enumerate(records):
+        if isinstance(record, dict) and all(isinstance(record.get(k, ""), str) for k in RECORD_FIELDS):
+            plain_pos.append(pos)
+            plain.append(record)
+        else:
+            odd.append((pos, record))
+
+    df = pd.DataFrame({k: [record.get(k, "") for record in plain] for k in RECORD_FIELDS}, index=plain_pos, dtype=object)
+    out = pd.DataFrame(index=df.index, columns=COLUMNS, dtype=object)
+
+    # Name extraction from subject: "<prefix> - Last, First Middle"
+    subject = df["Subject"]
+    name_parts = subject.str.split(" - ").str[-1].str.strip().str.split(",")
+    has_name = subject.str.contains(" - ", regex=False) & (name_parts.str.len() == 2)
+    ln_raw = name_parts.str[0].str.strip()
+    fn_first = name_parts.str[1].str.split().str[0]
+    out["LN"] = ln_raw.str.capitalize().where(has_name & (ln_raw != ""), "Unknown")
+    out["FN"] = fn_first.str.capitalize().where(has_name & fn_first.notna(), "Unknown")
+
+    # Email and Care Center extraction, with the same partition chains as parse_description
+    description = df["Description"]
+    email = _label_values(description, "Email:", "Entity:").str.strip()
+    out["EMAIL"] = email.where(description.str.contains("Entity:", regex=False), "")
+    cc = _label_values(description, "Care Center:", "Job Title:").str.split(n=1).str[0]
+    out["CC"] = cc.where(description.str.contains("Job Title:", regex=False) & cc.notna(), "")
+    out["Market"] = get_market_from_cc_series(out["CC"])
 
-for record in records:
+    out["SF_CaseNumber"] = df["CaseNumber"].str.lstrip("0")
+    out["SF_ID"] = df["Id"]
+
+    created = df["CreatedDate"]
+    formatted = {raw: created_date_normalizer.normalize(raw) for raw in pd.unique(created)}
+    out["SF_CreatedDate"] = created.map(formatted)
+
+    if odd:
+        odd_rows = {}
+        for pos, record in odd:
+            try:
+                info = extract_info(record)
+                odd_rows[pos] = [info[c] for c in COLUMNS]
+            except Exception as e:
+                print(f"Warning: Error processing record: {e}")
+        if odd_rows:
+            out = pd.concat([out, pd.DataFrame.from_dict(odd_rows, orient="index", columns=COLUMNS)]).sort_index()
+    return out
+
+def iter_batches(records, batch_size):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def extract_row(record):
+    """Extract one record into a row (a list in COLUMNS order); None when that fails."""
     try:
         info = extract_info(record)
-        if not info:  # Skip if extraction failed completely
-            error_count += 1
-            continue
-            
-        sheet_name = info["Market"] if info["Market"] in markets else "Other"
+        return [info[c] for c in COLUMNS] if info else None
+    except Exception as e:
+        print(f"Warning: Error processing record: {e}")
+        return None
+
+def extract_rows(batch, engine="records"):
+    """Extract a batch of records into rows (lists in COLUMNS order).
+
+    The result is aligned with the batch, with None for records that could not be extracted.
+    Module-level so it can run in --workers processes.
+    """
+    if engine == "pandas":
+        frame = extract_frame(batch)
+        rows = [None] * len(batch)
+        for pos, row in zip(frame.index, frame.values.tolist()):
+            rows[pos] = row
+        return rows
+    return [extract_row(record) for record in batch]
+
+def iter_extracted(jobs, engine, workers):
+    """Run extract_rows over (batch, context) jobs and yield (rows, context) in input order.
+
+    With workers > 1 the batches are shared out to a process pool. At most two batches per
+    worker are in flight, so a streamed export is never read far ahead of the output.
+    """
+    if workers <= 1:
+        for batch, context in jobs:
+            yield extract_rows(batch, engine), context
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch, context in jobs:
+            pending.append((pool.submit(extract_rows, batch, engine), context))
+            if len(pending) >= workers * 2:
+                future, context = pending.popleft()
+                yield future.result(), context
+        while pending:
+            future, context = pending.popleft()
+            yield future.result(), context
+
+# === Delta mode (--state) ===
+class CaseStateStore:
+    """SQLite store of the rows extracted for each case by earlier runs.
+
+    Cases are keyed by Id (CaseNumber when Id is missing) and stored with their change marker,
+    SystemModstamp or else LastModifiedDate, which Salesforce bumps on every edit. Exports that
+    select neither (the weekly flow's SOQL does not) are marked with a fingerprint of the fields
+    extract_info reads instead. A case is reused while its marker is unchanged; cases without a
+    key are always extracted.
+    Cases that are no longer in the export are removed when the run closes the store.
+    """
+    # Bump when extract_info changes so rows stored by an older version are re-extracted
+    STATE_VERSION = "3"
+    LOOKUP_CHUNK = 500
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        version = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is None or version[0] != self.STATE_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS cases")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (self.STATE_VERSION,))
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS cases (case_key TEXT PRIMARY KEY, marker TEXT NOT NULL, "
+            f"{', '.join(c + ' TEXT' for c in COLUMNS)}) WITHOUT ROWID"
+        )
+        self.seen = set()  # keys in this run's export, so the cases that left it can be removed on close
+        self.reused = self.new = self.changed = self.unmarked = self.duplicates = self.removed = 0
+
+    @staticmethod
+    def case_key(record):
+        """(case key, change marker) of a record, (None, None) when it has no key."""
+        if not isinstance(record, dict):
+            return None, None
+        key = record.get("Id") or record.get("CaseNumber")
+        if not key:
+            return None, None
+        marker = record.get("SystemModstamp") or record.get("LastModifiedDate")
+        if not marker:
+            # The export carries no modstamp: any edit to the extracted fields changes the fingerprint
+            fields = repr([record.get(k) for k in RECORD_FIELDS])
+            marker = "fp:" + hashlib.sha1(fields.encode("utf-8", "surrogatepass")).hexdigest()
+        return str(key), str(marker)
+
+    def _select(self, query, keys):
+        for i in range(0, len(keys), self.LOOKUP_CHUNK):
+            chunk = keys[i:i + self.LOOKUP_CHUNK]
+            yield from self.conn.execute(query.format(",".join("?" * len(chunk))), chunk)
+
+    def split(self, batch):
+        """Return (records to extract, context) for a batch; unchanged cases come from the store."""
+        keyed = [self.case_key(record) for record in batch]
+        query = f"SELECT case_key, marker, {', '.join(COLUMNS)} FROM cases WHERE case_key IN ({{}})"
+        # Sorted keys walk the case_key-ordered table in one direction
+        stored = {row[0]: row for row in self._select(query, sorted({key for key, _ in keyed if key}))}
+
+        reused = {}
+        pending, pending_info = [], []
+        for pos, (record, (key, marker)) in enumerate(zip(batch, keyed)):
+            if key is None:
+                self.unmarked += 1
+                pending.append(record)
+                pending_info.append((pos, None, None, None))
+                continue
+            previous = stored.get(key)
+            if key in self.seen:
+                # The key already came up in this run; its first record owns the stored row
+                self.duplicates += 1
+                status = None
+            else:
+                self.seen.add(key)
+                status = "changed" if previous else "new"
+            if previous is not None and previous[1] == marker:
+                reused[pos] = list(previous[2:])
+                continue
+            pending.append(record)
+            pending_info.append((pos, key, marker, status))
+        self.reused += len(reused)
+        return pending, (len(batch), reused, pending_info)
+
+    def merge(self, rows, context):
+        """Store freshly extracted rows and return the batch's rows in input order."""
+        batch_size, reused, pending_info = context
+        merged = [None] * batch_size
+        for pos, row in reused.items():
+            merged[pos] = row
+        updates = []
+        for (pos, key, marker, status), row in zip(pending_info, rows):
+            merged[pos] = row
+            if status and row is not None:
+                updates.append([key, marker] + row)
+                if status == "changed":
+                    self.changed += 1
+                else:
+                    self.new += 1
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO cases (case_key, marker, {', '.join(COLUMNS)}) "
+            f"VALUES ({','.join('?' * (len(COLUMNS) + 2))})",
+            updates,
+        )
+        return merged
+
+    def close(self):
+        """Remove the cases that are no longer in the export and commit."""
+        stale = [(key,) for (key,) in self.conn.execute("SELECT case_key FROM cases") if key not in self.seen]
+        self.conn.executemany("DELETE FROM cases WHERE case_key = ?", stale)
+        self.removed = len(stale)
+        self.conn.commit()
+        self.conn.close()
+
+# === Streaming workbook writer (--write-only) ===
+class StreamingReportWriter:
+    """Write-only workbook that receives each market row as soon as it is extracted.
+
+    openpyxl spools write-only sheets to temporary files, so memory stays flat however many
+    rows are written. Sheets are created on first use and put in market order on save.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheets = {}
+        self.failed = set()
+        # The columnar sidecar for the next stages is streamed alongside the sheets
+        self.sidecar = SidecarStreamWriter(path, COLUMNS) if sidecar_enabled() else None
+
+    def append(self, sheet_name, row):
+        if sheet_name in skip_markets or sheet_name in self.failed:
+            return
+        ws = self.sheets.get(sheet_name)
+        if ws is None:
+            try:
+                ws = self.workbook.create_sheet(sheet_name)
+                ws.append(COLUMNS)
+            except Exception as e:
+                print(f"Error creating sheet '{sheet_name}': {e}")
+                self.failed.add(sheet_name)
+                return
+            self.sheets[sheet_name] = ws
+        ws.append(row)
+        if self.sidecar is not None:
+            self.sidecar.append(sheet_name, row)
+
+    def save(self):
+        """Save the workbook and return the number of sheets written (nothing is saved when 0)."""
+        if not self.sheets:
+            if self.sidecar is not None:
+                self.sidecar.abort()
+            return 0
+        # Title the sheets in market order, as the DataFrame path does: openpyxl dedupes titles
+        # case-insensitively, so a sheet can be renamed ("MS" and "Ms" are saved as "MS", "Ms1")
+        order = sorted(self.sheets)
+        for index, sheet_name in enumerate(order):
+            self.sheets[sheet_name].title = f"~sheet{index}"
+        for sheet_name in order:
+            self.sheets[sheet_name].title = sheet_name
+        self.workbook._sheets = [self.sheets[sheet_name] for sheet_name in order]
+        self.workbook.save(self.path)
+        if self.sidecar is not None:
+            titles = {sheet_name: ws.title for sheet_name, ws in self.sheets.items()}
+            self.sidecar.close(self.workbook.sheetnames, titles)
+        return len(self.sheets)
+
+# === Load JSON data ===
+def load_records(json_file):
+    try:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
+    except (json.JSONDecodeError, FileNotFoundError, OSError) as e:
+        print(f"Error reading JSON file: {e}")
+        sys.exit(1)
+
+    if isinstance(json_data, list):
+        records = json_data  # If json_data is a list, use it directly
+    elif isinstance(json_data, dict):
+        records = json_data.get("records", [])
+    else:
+        print("Unexpected JSON structure.")
+        sys.exit(1)
+
+    print(f"Loaded {len(records)} records from {os.path.basename(json_file)}.")
+    return records
+
+def read_inputs(json_files, stream):
+    # Files are read one after another; in --stream mode each one is parsed incrementally
+    for json_file in json_files:
+        if stream:
+            print(f"Streaming records from {os.path.basename(json_file)}.")
+            yield from stream_records(json_file)
+        else:
+            yield from load_records(json_file)
+
+# === Arguments ===
+arg_parser = argparse.ArgumentParser(description="Split Salesforce case exports into per-market Excel sheets.")
+arg_parser.add_argument("json_files", nargs="+", help="Path(s) to Salesforce JSON exports, processed in the given order")
+arg_parser.add_argument("--stream", action="store_true",
+                        help="Parse the export incrementally instead of loading it whole with json.load "
+                             "(the extracted rows are still held per market until the workbook is written; "
+                             "add --write-only to keep peak memory flat)")
+arg_parser.add_argument("--engine", choices=["records", "pandas"], default="records",
+                        help="records: extract_info per record; pandas: vectorized extraction per batch")
+arg_parser.add_argument("--batch-size", type=int, default=50000,
+                        help="Records per batch: one DataFrame for --engine pandas, one work unit for --workers "
+                             "and --state (default: 50000; a plain run extracts record by record)")
+arg_parser.add_argument("--workers", type=int, default=1,
+                        help="Extract batches in this many processes (default: 1, no pool)")
+arg_parser.add_argument("--write-only", action="store_true",
+                        help="Stream rows into a write-only workbook as they are produced instead of building DataFrames")
+arg_parser.add_argument("--state", metavar="STATE_DB",
+                        help="Delta mode: SQLite file of cases extracted by earlier runs; a case is reused instead of "
+                             "extracted while its SystemModstamp (or LastModifiedDate, or when the export has neither, "
+                             "the fields it is extracted from) is unchanged")
+
+def main():
+    args = arg_parser.parse_args()
+
+    for json_file in args.json_files:
+        if not os.path.isfile(json_file):
+            print(f"JSON file not found: {json_file}")
+            sys.exit(1)
+
+    records = read_inputs(args.json_files, args.stream)
+
+    # === Output to Excel ===
+    output_date = datetime.now().strftime('%d%m%Y')
+    output_name = f"UserAccountDeactivationReport_{output_date}.xlsx"
+    output_folder = r"C:\RPA\PortalTerminationDevelopment\UserExportFile\SF" 
+    output_path = os.path.join(output_folder, output_name)
+    # === Ensure output directory exists and is writable ===
+    try:
+        if not os.path.exists(output_folder):
+            os.makedirs(output_folder)
+            print(f"Created output folder: {output_folder}")
+    
+        # Verify folder was actually created and is accessible
+        if not os.path.exists(output_folder):
+            print(f"Error: Output folder could not be created or accessed: {output_folder}")
+            sys.exit(1)
+    
+        # Test write permissions by creating a temporary file
+        test_file = os.path.join(output_folder, "temp_test_file.tmp")
+        try:
+            with open(test_file, 'w') as f:
+                f.write("test")
+            os.remove(test_file)
+        except (OSError, IOError, PermissionError) as e:
+            print(f"Error: No write permission to output folder {output_folder}: {e}")
+            sys.exit(1)
         
+    except (OSError, IOError, PermissionError) as e:
+        print(f"Error: Failed to create or access output folder {output_folder}: {e}")
+        sys.exit(1)
+
+    # Markets are discovered while the rows are bucketed, so each record is read and split only once
+    market_data = {}
+    processed_count = 0
+    error_count = 0
+
+    report_writer = StreamingReportWriter(output_path) if args.write_only else None
+
+    def add_row(row):
+        sheet_name = row[4]  # Market
+
         # Validate sheet_name is safe for Excel
         if not sheet_name or len(sheet_name) > 31:  # Excel sheet name limit
             sheet_name = "Other"
-        
-        market_data[sheet_name].append([
-            info["FN"], info["LN"], info["EMAIL"], info["CC"], info["Market"], 
-            info["SF_CaseNumber"], info["SF_ID"], info["SF_CreatedDate"]
-        ])
+
+        if report_writer is not None:
+            report_writer.append(sheet_name, row)
+        else:
+            market_data.setdefault(sheet_name, []).append(row)
+
+    try:
+        case_state = CaseStateStore(args.state) if args.state else None
+    except sqlite3.Error as e:
+        print(f"Error opening case state store {args.state}: {e}")
+        sys.exit(1)
+
+    if case_state is None and args.workers <= 1 and args.engine == "records":
+        # Nothing needs whole batches here: each record is extracted as soon as it is read, so a
+        # streamed export is never buffered
+        extracted_rows = map(extract_row, records)
+    else:
+        batches = iter_batches(records, args.batch_size)
+        if case_state is not None:
+            jobs = (case_state.split(batch) for batch in batches)
+        else:
+            jobs = ((batch, None) for batch in batches)
+        # Batches come back in input order, so the per-market rows are the same for any --workers
+        extracted = iter_extracted(jobs, args.engine, args.workers)
+        if case_state is not None:
+            extracted_rows = (row for rows, context in extracted for row in case_state.merge(rows, context))
+        else:
+            extracted_rows = (row for rows, _ in extracted for row in rows)
+
+    start_time = time.time()
+    for row in extracted_rows:
+        if row is None:
+            error_count += 1
+            continue
+        add_row(row)
         processed_count += 1
+    print(f"Extraction with the '{args.engine}' engine took {time.time() - start_time:.2f}s.")
+
+    if case_state is not None:
+        case_state.close()
+        print(f"Delta mode: {case_state.reused} unchanged cases reused, "
+              f"{case_state.new} new and {case_state.changed} changed cases extracted, "
+              f"{case_state.removed} cases no longer in the export removed from the store.")
+        if case_state.unmarked:
+            print(f"Delta mode: {case_state.unmarked} records lacking an Id/CaseNumber were extracted in full.")
+        if case_state.duplicates:
+            print(f"Delta mode: {case_state.duplicates} records repeat a case key seen earlier in the export.")
+
+    # Sheets are written in market order with the catch-all "Other" last
+    markets = sorted(m for m in market_data if m != "Other")
+    market_data = {m: market_data[m] for m in markets + ["Other"] if m in market_data}
+
+    print(f"Successfully processed {processed_count} records.")
+    if error_count > 0:
+        print(f"Encountered errors in {error_count} records.")
+
+    # === Write Excel file with comprehensive error handling ===
+    try:
+        # Check if any data exists to write
+        if processed_count == 0:
+            print("Warning: No records found to write to Excel file.")
+
+        if report_writer is not None:
+            if report_writer.save() == 0:
+                print("Error: No sheets could be created in Excel file.")
+                sys.exit(1)
+        else:
+            written_frames = {}
+            with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
+                sheets_created = 0
+                for market, rows in market_data.items():
+                    if market in skip_markets: #Skips writing the markets present in Skip_Markets.
+                        pass
+                    else: 
+                        if rows:
+                            try:
+                                df = pd.DataFrame(rows, columns=COLUMNS)
+                                df.to_excel(writer, sheet_name=market, index=False)
+                                # Keyed by the saved title: openpyxl renames case-colliding markets ("Ms" -> "Ms1")
+                                written_frames[writer.book.worksheets[-1].title] = df
+                                sheets_created += 1
+                            except Exception as e:
+                                print(f"Error creating sheet '{market}': {e}")
+                                continue
         
+                if sheets_created == 0:
+                    print("Error: No sheets could be created in Excel file.")
+                    sys.exit(1)
+
+            write_sidecar(output_path, written_frames, list(written_frames))
+            
+    except (OSError, IOError, PermissionError, ImportError) as e:
+        print(f"Error: Failed to create Excel file {output_path}: {e}")
+        sys.exit(1)
     except Exception as e:
-        print(f"Warning: Error processing record: {e}")
-        error_count += 1
-        continue
-
-print(f"Successfully processed {processed_count} records.")
-if error_count > 0:
-    print(f"Encountered errors in {error_count} records.")
-
-# === Output to Excel ===
-output_date = datetime.now().strftime('%d%m%Y')
-output_name = f"UserAccountDeactivationReport_{output_date}.xlsx"
-output_folder = r"C:\RPA\PortalTerminationDevelopment\UserExportFile\SF" 
-output_path = os.path.join(output_folder, output_name)
-# === Ensure output directory exists and is writable ===
-try:
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-        print(f"Created output folder: {output_folder}")
-    
-    # Verify folder was actually created and is accessible
-    if not os.path.exists(output_folder):
-        print(f"Error: Output folder could not be created or accessed: {output_folder}")
+        print(f"Unexpected error while writing Excel file: {e}")
         sys.exit(1)
-    
-    # Test write permissions by creating a temporary file
-    test_file = os.path.join(output_folder, "temp_test_file.tmp")
+
+    # === Verify file was actually created ===
     try:
-        with open(test_file, 'w') as f:
-            f.write("test")
-        os.remove(test_file)
-    except (OSError, IOError, PermissionError) as e:
-        print(f"Error: No write permission to output folder {output_folder}: {e}")
-        sys.exit(1)
-        
-except (OSError, IOError, PermissionError) as e:
-    print(f"Error: Failed to create or access output folder {output_folder}: {e}")
-    sys.exit(1)
-
-# === Write Excel file with comprehensive error handling ===
-try:
-    # Check if any data exists to write
-    total_records = sum(len(rows) for rows in market_data.values())
-    if total_records == 0:
-        print("Warning: No records found to write to Excel file.")
-    
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        sheets_created = 0
-        for market, rows in market_data.items():
-            if market in skip_markets: #Skips writing the markets present in Skip_Markets.
-                pass
-            else: 
-                if rows:
-                    try:
-                        df = pd.DataFrame(rows, columns=["FN", "LN", "EMAIL", "CC", "Market", "SF_CaseNumber", "SF_ID", "SF_CreatedDate"])
-                        df.to_excel(writer, sheet_name=market, index=False)
-                        sheets_created += 1
-                    except Exception as e:
-                        print(f"Error creating sheet '{market}': {e}")
-                        continue
-        
-        if sheets_created == 0:
-            print("Error: No sheets could be created in Excel file.")
+        if not os.path.exists(output_path):
+            print(f"Error: Excel file was not created at expected location: {output_path}")
             sys.exit(1)
-            
-except (OSError, IOError, PermissionError, ImportError) as e:
-    print(f"Error: Failed to create Excel file {output_path}: {e}")
-    sys.exit(1)
-except Exception as e:
-    print(f"Unexpected error while writing Excel file: {e}")
-    sys.exit(1)
-
-# === Verify file was actually created ===
-try:
-    if not os.path.exists(output_path):
-        print(f"Error: Excel file was not created at expected location: {output_path}")
-        sys.exit(1)
     
-    # Check if file has content (not empty)
-    file_size = os.path.getsize(output_path)
-    if file_size == 0:
-        print(f"Error: Excel file was created but is empty: {output_path}")
-        sys.exit(1)
+        # Check if file has content (not empty)
+        file_size = os.path.getsize(output_path)
+        if file_size == 0:
+            print(f"Error: Excel file was created but is empty: {output_path}")
+            sys.exit(1)
         
-    print(f"Excel file successfully saved at: {output_path}")
+        print(f"Excel file successfully saved at: {output_path}")
     
-except (OSError, IOError) as e:
-    print(f"Error verifying Excel file creation: {e}")
-    sys.exit(1)
\ No newline at end of file
+    except (OSError, IOError) as e:
+        print(f"Error verifying Excel file creation: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,15 @@ import time
 import sys
 import os
 from openpyxl import load_workbook
-from openpyxl.styles import Font, PatternFill, Border, Side
 
-# Markets to skip from UHC logic
-skip_markets = ["UL", "UM", "NE", "UG","CW","AG","OV","Other"] 
+# Shared helpers live in Common/Common_Python_Scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Common", "Common_Python_Scripts"))
+from SF_Sidecar import write_sidecar
+from SF_Report_Scan import ReportScan
+from SF_Report_Counts import PORTAL_REPORTS, portal_report_counts
+from SF_Report_Sheet import write_report_sheet
+
+UHC_REPORT = next(report for report in PORTAL_REPORTS if report.sheet_name == 'UHC_Report')
 
 def wait_for_file(filepath, timeout=20):
     print(f"Waiting for file: {filepath}")
@@ -41,92 +46,28 @@ sf_path = sys.argv[1]
 wait_for_file(sf_path)
 
 try:
-    wb = load_workbook(sf_path)
-    all_sheets = wb.sheetnames
+    # Scan the sheets read-only; the workbook is loaded for editing only to insert the report
+    scan = ReportScan(sf_path)
     summary_data = []
 
-    for sheet_name in all_sheets:
-        if sheet_name == 'UHC_Report':
-            continue
-
-        df = pd.read_excel(sf_path, sheet_name=sheet_name, engine='openpyxl')
-        total = len(df)
-
-        # Default counts
-        not_found = 0
-        already_deactivated = 0
-        Deactivate = 0
-        Failure = 0
-
-        # Skip special markets but still record total count
-        if sheet_name in skip_markets:
-            summary_data.append([sheet_name, total, 0, 0, 0, 0])
+    for sheet_name in scan.sheetnames:
+        if sheet_name == UHC_REPORT.sheet_name:
             continue
 
-        # Only process if 'UHC' column is available
-        if 'UHC' in df.columns:
-            df['UHC'] = df['UHC'].astype(str).fillna("").str.strip()
-
-            not_found = df['UHC'].str.contains(
-                r'Success - User not found', case= False,na=False
-            ).sum()
-
-            already_deactivated = df['UHC'].str.contains(
-                r'Success - User found and already deactivated', case= False, na=False
-            ).sum()
-
-            Deactivate = df['UHC'].str.contains(
-                r'Success - User found and deactivated',case= False,  na=False
-            ).sum()
-
-            Failure = df['UHC'].str.contains(
-                r'Failure - Action Required',case= False,  na=False
-            ).sum()
+        # Skipped markets and sheets without the column still record their total count
+        total, uhc_values = scan.column(sheet_name, UHC_REPORT.column)
+        summary_data.append([sheet_name, total] + portal_report_counts(UHC_REPORT, sheet_name, uhc_values))
 
-        summary_data.append([sheet_name, total, not_found, already_deactivated, Deactivate, Failure])
-
-    # Remove old 'UHC_Report' sheet if it exists
-    if 'UHC_Report' in wb.sheetnames:
-        del wb['UHC_Report']
-
-    # Create new 'UHC_Report' summary sheet
-    main_ws = wb.create_sheet('UHC_Report', 0)
-    headers = ['Market', 'SF_COUNT', 'UHC_UserNotFound', 'UHC_UserFoundandAlreadyDeactivated', 'UHC_UserFoundandDeactivated', 'UHC_Failure']
-    main_ws.append(headers)
-
-    # Style setup
-    bold_font = Font(bold=True)
-    green_fill = PatternFill(start_color='C6EFCE', end_color='C6EFCE', fill_type='solid')
-    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                         top=Side(style='thin'), bottom=Side(style='thin'))
-
-    for cell in main_ws[1]:
-        cell.font = bold_font
-        cell.border = thin_border
-
-    for row in summary_data:
-        main_ws.append(row)
-
-    # Add totals row
-    totals = ['ALL Markets']
-    for i in range(1,len(headers)):
-        total = sum(row[i] for row in summary_data)
-        totals.append(total)
-
-    main_ws.append(totals)
-
-    # Apply styling to totals row
-    for cell in main_ws[main_ws.max_row]:
-        cell.fill = green_fill
-        cell.font = bold_font
-        cell.border = thin_border
+    scan.close()
+    wb = load_workbook(sf_path)
 
-    # Apply borders to all other cells
-    for row in main_ws.iter_rows(min_row=2, max_row=main_ws.max_row - 1, min_col=1, max_col=len(headers)):
-        for cell in row:
-            cell.border = thin_border
+    # Replace the 'UHC_Report' summary sheet, as the first sheet
+    headers = ['Market', 'SF_COUNT'] + [header for header, _ in UHC_REPORT.outcomes]
+    rows = write_report_sheet(wb, UHC_REPORT.sheet_name, 0, headers, summary_data)
 
     wb.save(sf_path)
+    scan.frames[UHC_REPORT.sheet_name] = pd.DataFrame(rows, columns=headers)
+    write_sidecar(sf_path, scan.frames, wb.sheetnames)
     print("Main summary sheet created successfully as the first sheet.")
 
 except Exception as e:
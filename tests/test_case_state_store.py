@@ -0,0 +1,38 @@
+import importlib.util
+import os
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+def _load_json_sf():
+    path = os.path.join(REPO_ROOT, "Salesforce_DataCollection", "Python_Scripts", "JSON_SF_V6.py")
+    spec = importlib.util.spec_from_file_location("JSON_SF_V6", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+JSON_SF = _load_json_sf()
+
+def _record(case_number, subject):
+    # Fields the weekly flow's SOQL selects: no SystemModstamp/LastModifiedDate
+    return {"Id": f"500{case_number}", "CaseNumber": case_number, "Subject": subject, "IsClosed": False,
+            "Description": "Email: a@x.com Entity: E Care Center: NC1 Clinic Job Title: RN",
+            "CreatedDate": "2024-05-01T10:00:00.000+0000"}
+
+def _run(path, records):
+    store = JSON_SF.CaseStateStore(path)
+    pending, context = store.split(records)
+    rows = store.merge(JSON_SF.extract_rows(pending), context)
+    store.close()
+    return store, rows
+
+def test_unmarked_export_reuses_unchanged_cases(tmp_path):
+    path = str(tmp_path / "state.db")
+    records = [_record("0001", "Term - Doe, John"), _record("0002", "Term - Roe, Jane")]
+    first, first_rows = _run(path, records)
+    assert (first.new, first.unmarked) == (2, 0)
+
+    records[1] = _record("0002", "Term - Roe, Janet")
+    second, second_rows = _run(path, records)
+    assert (second.reused, second.changed, second.new) == (1, 1, 0)
+    assert second_rows[0] == first_rows[0]
+    assert second_rows[1] == JSON_SF.extract_rows(records[1:])[0]
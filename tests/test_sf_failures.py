@@ -0,0 +1,45 @@
+import os
+import sys
+
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Common", "Common_Python_Scripts"))
+from SF_Failures import FAILURE_TEXT, mark_failures
+
+def _workbook():
+    wb = Workbook()
+    wb.remove(wb.active)
+    for sheet_name, portal_values in [("FL", ["a@x.com", "b@x.com"]),
+                                      ("TX", ["Success - User not found"] * 2)]:
+        ws = wb.create_sheet(sheet_name)
+        ws.append(["FN", "LN", "EMAIL", "UHC", "CIGNA"])
+        for value in portal_values:
+            ws.append(["First", "Last", "user@x.com", value, value])
+    return wb
+
+def _portal_values(ws):
+    return [row[3:] for row in ws.iter_rows(min_row=2, values_only=True)]
+
+def test_only_sheets_with_leftover_emails_are_changed():
+    wb = _workbook()
+
+    assert mark_failures(wb, ["FL", "TX"]) == ["FL"]
+    assert _portal_values(wb["FL"]) == [(FAILURE_TEXT, FAILURE_TEXT)] * 2
+
+def test_sheet_failing_mid_way_is_reported_changed(monkeypatch):
+    wb = _workbook()
+    ws = wb["FL"]
+    iter_cols = ws.iter_cols
+    calls = []
+
+    def failing_iter_cols(*args, **kwargs):
+        # The UHC column is marked, then the sheet breaks before CIGNA
+        calls.append(kwargs)
+        if len(calls) > 1:
+            raise RuntimeError("sheet broke")
+        return iter_cols(*args, **kwargs)
+
+    monkeypatch.setattr(ws, "iter_cols", failing_iter_cols)
+
+    assert mark_failures(wb, ["FL", "TX"]) == ["FL"]
+    assert _portal_values(ws) == [(FAILURE_TEXT, "a@x.com"), (FAILURE_TEXT, "b@x.com")]
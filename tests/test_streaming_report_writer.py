@@ -0,0 +1,48 @@
+import importlib.util
+import os
+import sys
+
+from openpyxl import load_workbook
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_ROOT, "Common", "Common_Python_Scripts"))
+from SF_Sidecar import load_sidecar, sidecar_enabled
+
+def _load_json_sf():
+    path = os.path.join(REPO_ROOT, "Salesforce_DataCollection", "Python_Scripts", "JSON_SF_V6.py")
+    spec = importlib.util.spec_from_file_location("JSON_SF_V6", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+JSON_SF = _load_json_sf()
+
+def _row(market, case_number):
+    return ["First", "Last", f"user{case_number}@example.com", f"{market}100", market,
+            case_number, f"ID{case_number}", "05-01-2024"]
+
+def _case_numbers(ws):
+    return [row[5] for row in ws.iter_rows(min_row=2, values_only=True)]
+
+def test_case_colliding_markets_are_titled_in_market_order(tmp_path):
+    path = str(tmp_path / "report.xlsx")
+    writer = JSON_SF.StreamingReportWriter(path)
+    # "Ms" shows up first, but the DataFrame path writes "MS" first and saves "Ms" as "Ms1"
+    writer.append("Ms", _row("Ms", "1"))
+    writer.append("MS", _row("MS", "2"))
+    writer.append("FL", _row("FL", "3"))
+    writer.append("Ms", _row("Ms", "4"))
+
+    assert writer.save() == 3
+
+    wb = load_workbook(path)
+    assert wb.sheetnames == ["FL", "MS", "Ms1"]
+    assert _case_numbers(wb["FL"]) == ["3"]
+    assert _case_numbers(wb["MS"]) == ["2"]
+    assert _case_numbers(wb["Ms1"]) == ["1", "4"]
+
+    if sidecar_enabled():
+        sidecar = load_sidecar(path)
+        assert sidecar.sheetnames == ["FL", "MS", "Ms1"]
+        assert sidecar.frames["MS"]["SF_CaseNumber"].tolist() == [2]
+        assert sidecar.frames["Ms1"]["SF_CaseNumber"].tolist() == [1, 4]